@@ -5,86 +5,676 @@
 #
 # This asset is licensed under the MIT License.
 
+import sys
+
+# --profile-startup のときは、ほかのモジュールを読み込む前に計測を始める
+if '--profile-startup' in sys.argv[1:]:
+    from utils import startup_profile
+    startup_profile.start()
+
+import argparse
+import functools
+import importlib
+import json
+import os
+import signal
 import time
-from PIL import Image
-# --- ファイル名と関数名を一般化 ---
-from slide_weather_location1 import create_weather_slide_loc1
-from slide_calendar import create_calendar_slide
-from slide_learning import create_learning_slide
-from slide_weather_location2 import create_weather_slide_loc2
 
 # e-Paper表示用のユーティリティをインポート
-from utils.epaper import init_display, display_image, sleep_display, full_refresh_cycle
+# PILやスライドのモジュールは、前回のフレームを表示したあと、必要になったときに読み込む
+from utils import startup_profile
+from utils.cadence import CadenceController, load_config as load_cadence_config
+from utils.epaper import init_display, display_packed, sleep_display, full_refresh_cycle, clear_display, pack_image
+from utils.frame_store import FrameStore
+from utils.learning_store import open_content_store
+from utils.runtime import EventLoop
+from utils.scheduler import SlideSpec, SlideScheduler
+from utils.watcher import FileWatcher
 
 # グローバル変数
 REFRESH_INTERVAL = 180  # 更新間隔（秒）
 FULL_REFRESH_COUNT = 12 # スライドが4枚になったため、完全更新の閾値を調整
+PREFETCH_LEAD = 30      # 次のスライドを何秒前から裏で描画しておくか
+SERVER_CHECK_INTERVAL = 60  # 描画サーバーが描き直しの要否を確認する間隔（秒）
+CLIENT_RETRY_INTERVAL = 30  # シンクライアントがサーバーに再接続するまでの間隔（秒）
+CLIENT_LISTING_INTERVAL = 300  # シンクライアントがサーバーのスライド構成を確認し直す間隔（秒）
+FRAME_STORE_DIR = 'last_frames'  # 最後に表示したフレームの保存先
+RENDER_DEADLINE = 60    # スライドの描画にかけてよい時間（秒）。slideshow.render_deadline で変更可
+PRESENCE_CHECK_INTERVAL = 60  # 表示を止めている間、人の気配を確認する間隔（秒）
+PHOTO_CHANGE_INTERVAL = 3600  # 写真を切り替える間隔の既定値（slide_photo.DEFAULT_CHANGE_INTERVAL と同じ）
+STALE_FONT_PATH = os.path.join(os.path.dirname(__file__), 'fonts', 'ReggaeOne-Regular.ttf')
+
+
+def lazy_factory(module_name, function_name):
+    """スライドのモジュールを、最初に描画するときに読み込む生成関数"""
+    def factory():
+        with startup_profile.phase(module_name):
+            return getattr(importlib.import_module(module_name), function_name)()
+    return factory
+
+
+def build_slides():
+    """表示するスライド（表示順）と、それぞれが依存するデータ"""
+    # --- ファイル名と関数名を一般化 ---
+    # スライドのモジュールは最初の描画のときに（ワーカースレッドで）読み込む
+    from utils.weather_api import CACHE_DURATION as WEATHER_TTL, effective_ttl
+
+    # APIの残り回数が少ないときは、天気スライドの描き直しも間隔を延ばす
+    weather_ttl = functools.partial(effective_ttl, WEATHER_TTL)
+    # 学習コンテンツはJSONでもSQLiteでもよいので、設定されたファイルを監視する。
+    # SQLite版は表示履歴の書き込みでも更新されるので、取り込みのたびに増える番号で判定する
+    learning_file = load_config('learning_slide').get('content_file', 'learning_content.json')
+    learning_store = open_content_store(learning_file)
+
+    slides = [
+        SlideSpec("天気予報 (ロケーション1)", lazy_factory('slide_weather_location1', 'create_weather_slide_loc1'),
+                  ttl=weather_ttl, files=['config.json']),
+        SlideSpec("カレンダーの表示", lazy_factory('slide_calendar', 'create_calendar_slide'),
+                  daily=True, files=['config.json', 'schedule.json']),
+        SlideSpec("今日の学習ポイントの表示", lazy_factory('slide_learning', 'create_learning_slide'),
+                  daily=True, files=['config.json', learning_file],
+                  versions={learning_file: learning_store.version}),
+        SlideSpec("天気予報 (ロケーション2)", lazy_factory('slide_weather_location2', 'create_weather_slide_loc2'),
+                  ttl=weather_ttl, files=['config.json']),
+    ]
+
+    # 写真スライドは、写真フォルダが設定されていて実際に存在するときだけ追加する（NumPyが必要）
+    photo_config = load_config('photo_slide')
+    photo_directory = photo_config.get('directory')
+    if photo_directory and os.path.isdir(photo_directory):
+        slides.append(SlideSpec("家族の写真", lazy_factory('slide_photo', 'create_photo_slide'),
+                                ttl=photo_config.get('change_interval', PHOTO_CHANGE_INTERVAL),
+                                files=['config.json']))
+    return slides
+
+
+def build_remote_slides(client):
+    """描画サーバーのスライド一覧から、フレームを取得するだけのスライドを作る"""
+    while True:
+        try:
+            listing = client.slides()
+            if listing:
+                break
+            print("描画サーバーにまだスライドがありません")
+        except OSError as e:
+            print(f"描画サーバーに接続できません: {e}")
+        time.sleep(CLIENT_RETRY_INTERVAL)
+    return remote_slide_specs(client, listing)
+
+
+def remote_slide_specs(client, listing):
+    # ttl=0: 毎回サーバーに問い合わせる（変化がなければ304で済む）
+    return [SlideSpec(item['name'], functools.partial(client.fetch, item['index']), ttl=0)
+            for item in listing]
 
-def main():
+
+def watch_remote_slides(loop, client, show):
+    """描画サーバーのスライド構成が変わったら（サーバーの再起動など）、スライドを作り直す"""
+    def check():
+        loop.run_in_background(client.slides, worker='listing', on_done=on_listing)
+
+    def on_listing(future):
+        try:
+            listing = future.result()
+        except OSError:
+            listing = None  # 接続できないときは、フレームの取得側でエラーを表示している
+        if listing and [item['name'] for item in listing] != [spec.name for spec in show.slides]:
+            print("描画サーバーのスライド構成が変わりました")
+            show.replace_slides(remote_slide_specs(client, listing))
+        loop.call_later(CLIENT_LISTING_INTERVAL, check)
+
+    loop.call_later(CLIENT_LISTING_INTERVAL, check)
+
+
+def load_config(section='slideshow'):
+    """設定ファイル(config.json)からスライドショー全体（または指定した項目）の設定を読み込む"""
     try:
-        # ディスプレイの初期化
-        epd = init_display()
+        with open('config.json', 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        return config.get(section, {})
+    except Exception:
+        return {} # エラーの場合は空の設定を返す
+
+
+def render_slide(factory):
+    """スライドを生成し、e-Paperの向きに合わせて回転・パックする（ワーカースレッドで実行）"""
+    image = factory()
+    from PIL import Image  # スライドのモジュールが読み込み済み（読み込み時間はスライドの分として数える）
+    return pack_image(image.transpose(Image.ROTATE_180))
+
+
+def fetch_frame(factory):
+    """シンクライアント用: factoryがすでにパック済みのフレームを返す"""
+    return factory()
+
+
+def stale_frame(packed, size, since):
+    """古いフレームの隅に「stale since HH:MM」と書き込んだフレームを作る"""
+    from PIL import Image, ImageDraw, ImageFont
+    image = Image.frombytes('1', size, bytes(packed)).transpose(Image.ROTATE_180)
+    draw = ImageDraw.Draw(image)
+    try:
+        font = ImageFont.truetype(STALE_FONT_PATH, 18)
+    except OSError:
+        font = ImageFont.load_default()
+    text = f"stale since {time.strftime('%H:%M', time.localtime(since))}"
+    left, top, right, bottom = draw.textbbox((0, 0), text, font=font)
+    x = size[0] - (right - left) - 16
+    y = size[1] - (bottom - top) - 12
+    draw.rectangle((x - 6, y - 4 + top, x + (right - left) + 6, y + bottom + 4), fill=255, outline=0)
+    draw.text((x - left, y), text, font=font, fill=0)
+    return pack_image(image.transpose(Image.ROTATE_180))
+
+
+class SlideShow:
+    """タイマーでスライドを切り替え、入力が変わったスライドだけを裏で描き直す"""
+
+    def __init__(self, loop, epd, slides, config=None, render_func=render_slide, frame_store=None,
+                 on_event=None, cadence=None):
+        config = config or {}
+        self.loop = loop
+        self.epd = epd
+        self.slides = slides
+        self.render_func = render_func
+        self.frame_store = frame_store
+        self.on_event = on_event  # on_event(種類, スライド名)。シミュレーションのタイムライン用
+        self.cadence = cadence    # 表示時間と書き換えの方法を決める（なければ一定間隔・full）
+        self.scheduler = SlideScheduler(
+            slides, static_dwell_factor=config.get('static_dwell_factor', 1.0))
+        self.skip_unchanged = config.get('skip_unchanged', False)
+        self.render_deadline = config.get('render_deadline', RENDER_DEADLINE)
+        self.deadline_misses = {i: 0 for i in range(len(slides))}  # スライドごとの締め切り超過回数
+        self.render_errors = {i: 0 for i in range(len(slides))}
+        self.index = -1           # 現在表示中のスライド
+        self.display_count = 0    # 完全リフレッシュ用の表示カウンター
+        self.rendering = set()    # 描画を依頼したスライド番号
+        self.started = set()      # そのうち、実際に描画が始まったスライド番号
+        self.overrun = set()      # 締め切りを過ぎてもまだ描画中のスライド番号
+        self.asleep = False
+        self.idle = False         # 人の気配がなく、表示を止めているか
+        self._rotation_timer = None
+        self._prefetch_timer = None
+        self._deadline_timer = None
+        self._awaiting = None     # 描き上がるのを待って表示するスライド番号
+        self._consecutive_skips = 0
+
+    def start(self):
+        self.loop.call_soon(self.show_next)
+
+    def replace_slides(self, slides):
+        """スライドの構成を差し替え、先頭から表示し直す（描画中だった分の結果は捨てる）"""
+        self._cancel_timers()
+        self._cancel_deadline()
+        self.slides = slides
+        self.scheduler = SlideScheduler(slides, static_dwell_factor=self.scheduler.static_dwell_factor)
+        self.deadline_misses = {i: 0 for i in range(len(slides))}
+        self.render_errors = {i: 0 for i in range(len(slides))}
+        self.rendering, self.started, self.overrun = set(), set(), set()
+        self.index = -1
+        self.loop.call_soon(self.show_next)
+
+    def resume(self, index):
+        """起動直後に保存済みのフレームを表示した場合、その続きから始める"""
+        if 0 <= index < len(self.slides):
+            self.index = index
+        self.display_count += 1
+        self.asleep = True
+
+    # --- ローテーション ---
+
+    def show_next(self):
+        if self.cadence and self.cadence.idle():
+            self._enter_idle()
+            return
+        if self.idle:
+            print("人の気配があったため、表示を再開します")
+            self.idle = False
+        index = self._next_index()
+        if index is None:
+            # どのスライドも変化していないので、画面はそのままにしておく
+            print("変化のあるスライドがないため、表示を据え置きます")
+            self._schedule_rotation(self._plan()[0])
+            return
+        self.index = index
+        print(f"スライド{self.index}: {self.slides[self.index].name}")
+        self.show(self.index)
+
+    def _enter_idle(self):
+        """誰も見ていない間は切り替えを止め、パネルを眠らせておく"""
+        if not self.idle:
+            print("人の気配がないため、表示を止めます")
+            self.idle = True
+            if not self.asleep:
+                try:
+                    sleep_display(self.epd)
+                    self.asleep = True
+                except Exception as e:
+                    print(f"表示でエラーが発生しました: {e}")
+        self._cancel_timers()
+        self._rotation_timer = self.loop.call_later(PRESENCE_CHECK_INTERVAL, self.show_next)
+
+    def wake(self):
+        """人の気配の合図を受けたら、止めていた表示をすぐに再開する"""
+        if self.idle:
+            self._cancel_timers()
+            self.loop.call_soon(self.show_next)
+
+    def _plan(self):
+        """(表示時間, 書き換えの方法)"""
+        if self.cadence:
+            return self.cadence.plan()
+        return REFRESH_INTERVAL, 'full'
+
+    def _next_index(self):
+        for step in range(1, len(self.slides) + 1):
+            index = (self.index + step) % len(self.slides)
+            if not (self.skip_unchanged and self.scheduler.is_unchanged(index)):
+                return index
+        return None
+
+    def show(self, index):
+        """キャッシュが使えればすぐ表示し、入力が変わっていれば描き直してから表示する"""
+        self._cancel_deadline()
+        frame = self.scheduler.cached(index)
+        if frame is not None:
+            self._event('cache_hit', index)
+            self.present(index, frame)
+        elif index in self.overrun:
+            # 前回の描画がまだ終わっていないので、待たずに古いフレームで代用する
+            self.fallback(index)
+        else:
+            self._awaiting = index
+            self.render(index)
+            # 締め切りまでに描き終わらなければ、古いフレームで代用する。
+            # 締め切りは描画が実際に始まった時点から数える
+            if index in self.started:
+                self._start_deadline(index)
+
+    def prefetch(self, index):
+        if not self.scheduler.is_fresh(index):
+            self.render(index)
+
+    def render(self, index):
+        if index in self.rendering:
+            return
+        self.rendering.add(index)
+        signature = self.scheduler.signature(index)
+        slides = self.slides
+        factory = slides[index].factory
+
+        def run():
+            self.loop.call_soon_threadsafe(self._on_render_started, index, slides)
+            return self.render_func(factory)
+
+        # スライドごとに専用のスレッドで描画し、止まったスライドの後ろにほかのスライドを並ばせない
+        self.loop.run_in_background(
+            run, worker=index,
+            on_done=lambda future: self._on_rendered(index, future, signature, slides))
+
+    def _on_render_started(self, index, slides):
+        if slides is self.slides and index in self.rendering:
+            self.started.add(index)
+            if index == self._awaiting:
+                self._start_deadline(index)
+
+    def _on_rendered(self, index, future, signature, slides):
+        if slides is not self.slides:
+            return  # 描画中にスライドの構成が変わった
+        self.rendering.discard(index)
+        self.started.discard(index)
+        self.overrun.discard(index)
+        waiting = index == self._awaiting
+        try:
+            frame = future.result()
+        except Exception as e:
+            self.render_errors[index] += 1
+            print(f"スライド{index}の描画でエラーが発生しました: {e}")
+            if waiting:
+                self._cancel_deadline()
+                self.fallback(index)
+            return
+        self.scheduler.store(index, frame, signature)
+        self._event('render', index)
+        # 表示中のスライドならすぐ表示し（締め切りを過ぎていても新しい方に差し替える）、
+        # 先読みなら次回用に取っておく
+        if index == self.index:
+            self._cancel_deadline()
+            self.present(index, frame)
+
+    def _start_deadline(self, index):
+        if self._deadline_timer is None:
+            deadline = self.slides[index].deadline or self.render_deadline
+            self._deadline_timer = self.loop.call_later(deadline, self._on_deadline, index)
+
+    def _on_deadline(self, index):
+        self._deadline_timer = None
+        if index != self._awaiting or index not in self.rendering:
+            return
+        self._awaiting = None
+        self.overrun.add(index)
+        self.deadline_misses[index] += 1
+        print(f"スライド{index}の描画が締め切りに間に合いませんでした "
+              f"(累計{self.deadline_misses[index]}回)")
+        self.fallback(index)
+
+    def _cancel_deadline(self):
+        self._awaiting = None
+        if self._deadline_timer:
+            self._deadline_timer.cancel()
+            self._deadline_timer = None
+
+    def fallback(self, index):
+        """最後に描画できたフレームに注記を付けて表示する。なければ次のスライドへ進む"""
+        last = self.scheduler.last_good(index)
+        if last is None and self.frame_store:
+            last = self.frame_store.load(index, self.slides[index].name)
+        if last is None:
+            self._consecutive_skips += 1
+            print(f"スライド{index}を飛ばします")
+            # すべてのスライドが続けて失敗したときは、通常の間隔で待つ
+            delay = self._plan()[0] if self._consecutive_skips >= len(self.slides) else 0
+            self._schedule_rotation(delay)
+            return
+        frame, since = last
+        self._event('stale', index)
+        interval, mode = self._plan()
+        try:
+            frame = stale_frame(frame, (self.epd.width, self.epd.height), since)
+        except Exception as e:
+            # シンクライアントにPILがない場合など。注記なしで古いフレームをそのまま出す
+            print(f"古いフレームに注記を付けられませんでした: {e}")
+        self.display(frame, mode)
+        self._schedule_rotation(interval)
 
-        # 表示カウンター
-        display_count = 0
+    def present(self, index, frame):
+        self._event('slide', index)
+        interval, mode = self._plan()
+        if self.display(frame, mode):
+            startup_profile.first_frame()
+            self._consecutive_skips = 0
+            if self.frame_store:
+                self.frame_store.save(index, self.slides[index].name, frame)
+        changed = self.scheduler.mark_displayed(index)
+        self._schedule_rotation(self.scheduler.dwell(interval, changed))
 
-        # スライドを順番に表示するループ
-        while True:
+    def _schedule_rotation(self, delay):
+        """次のスライドへの切り替えと、その先読みを予約し直す"""
+        self._cancel_timers()
+        self._rotation_timer = self.loop.call_later(delay, self.show_next)
+        next_index = (self.index + 1) % len(self.slides)
+        self._prefetch_timer = self.loop.call_later(
+            max(0, delay - PREFETCH_LEAD), self.prefetch, next_index)
+
+    def _event(self, kind, index):
+        if self.on_event:
+            self.on_event(kind, self.slides[index].name)
+
+    def _cancel_timers(self):
+        for timer in (self._rotation_timer, self._prefetch_timer):
+            if timer:
+                timer.cancel()
+
+    # --- 表示 ---
+
+    def display(self, frame, mode='full'):
+        """フレームをパネルに表示する。失敗してもループは止めずにFalseを返す"""
+        started = self.loop.time()
+        refreshes = 0
+        try:
+            if self.asleep:
+                self.epd.init()
             # 一定回数表示したら完全リフレッシュ
-            if display_count >= FULL_REFRESH_COUNT:
+            if self.display_count >= FULL_REFRESH_COUNT:
                 print("完全リフレッシュサイクルを実行")
-                full_refresh_cycle(epd)
-                display_count = 0
-
-            # --- スライド0: 天気予報 (ロケーション1) ---
-            print("スライド0: 天気予報 (ロケーション1)")
-            weather_image = create_weather_slide_loc1()
-            rotated_image = weather_image.transpose(Image.ROTATE_180)
-            display_image(epd, rotated_image)
-            display_count += 1
-            sleep_display(epd)
-            time.sleep(REFRESH_INTERVAL)
-            epd.init()
+                full_refresh_cycle(self.epd)
+                refreshes += 2
+                self.display_count = 0
+            display_packed(self.epd, frame, mode)
+            refreshes += 3 if mode == 'full' else 1
+            self.display_count += 1
+            sleep_display(self.epd)
+            self.asleep = True
+            return True
+        except Exception as e:
+            print(f"表示でエラーが発生しました: {e}")
+            return False
+        finally:
+            if self.cadence:
+                self.cadence.record(refreshes, self.loop.time() - started)
 
-            # --- スライド1: カレンダーの表示 ---
-            print("スライド1: カレンダーの表示")
-            calendar_image = create_calendar_slide()
-            rotated_calendar_image = calendar_image.transpose(Image.ROTATE_180)
-            display_image(epd, rotated_calendar_image)
-            display_count += 1
-            sleep_display(epd)
-            time.sleep(REFRESH_INTERVAL)
-            epd.init()
+    # --- ファイル変更・シグナル ---
 
-            # --- スライド2: 今日の学習ポイントの表示 ---
-            print("スライド2: 今日の学習ポイントの表示")
-            learning_image = create_learning_slide()
-            rotated_learning_image = learning_image.transpose(Image.ROTATE_180)
-            display_image(epd, rotated_learning_image)
-            display_count += 1
-            sleep_display(epd)
-            time.sleep(REFRESH_INTERVAL)
-            epd.init()
+    def on_file_changed(self, path):
+        print(f"{path} が変更されました")
+        self.invalidate(self.scheduler.affected_by(path))
 
-            # --- スライド3: 天気予報 (ロケーション2) ---
-            print("スライド3: 天気予報 (ロケーション2)")
-            weather_image_yomitan = create_weather_slide_loc2()
-            rotated_image_yomitan = weather_image_yomitan.transpose(Image.ROTATE_180)
-            display_image(epd, rotated_image_yomitan)
-            display_count += 1
-            sleep_display(epd)
-            time.sleep(REFRESH_INTERVAL)
-            epd.init()
+    def reload(self):
+        print("再読み込みします (SIGHUP)")
+        self.invalidate(range(len(self.slides)))
+
+    def invalidate(self, indices):
+        """キャッシュを捨て、表示中のスライドが対象ならすぐ描き直す"""
+        for index in indices:
+            self.scheduler.invalidate(index)
+            if index == self.index:
+                self.render(index)
+
+    def report(self):
+        """スライドごとの締め切り超過・エラー回数を表示する"""
+        for index, spec in enumerate(self.slides):
+            print(f"スライド{index} ({spec.name}): 締め切り超過 {self.deadline_misses[index]}回, "
+                  f"エラー {self.render_errors[index]}回")
+        if self.cadence:
+            self.cadence.report()
+
+    def shutdown(self):
+        print("プログラムを終了します")
+        self._cancel_timers()
+        self._cancel_deadline()
+        self.report()
+        self.loop.stop()
+
+
+class RenderServer:
+    """パネルを持たず、スライドを描画してパック済みフレームを配信する"""
+
+    def __init__(self, loop, slides, publisher):
+        self.loop = loop
+        self.slides = slides
+        self.publisher = publisher
+        self.scheduler = SlideScheduler(slides)
+        self.rendering = set()
+        self._timer = None
+
+    def start(self):
+        self.loop.call_soon(self.refresh)
+
+    def refresh(self):
+        """入力が変わったスライドだけを描き直す"""
+        for index in range(len(self.slides)):
+            if not self.scheduler.is_fresh(index) and index not in self.rendering:
+                self.render(index)
+        if self._timer:
+            self._timer.cancel()
+        self._timer = self.loop.call_later(SERVER_CHECK_INTERVAL, self.refresh)
+
+    def render(self, index):
+        self.rendering.add(index)
+        signature = self.scheduler.signature(index)
+        self.loop.run_in_background(
+            render_slide, self.slides[index].factory, worker=index,
+            on_done=lambda future: self._on_rendered(index, future, signature))
+
+    def _on_rendered(self, index, future, signature):
+        self.rendering.discard(index)
+        try:
+            frame = future.result()
+        except Exception as e:
+            print(f"スライド{index}の描画でエラーが発生しました: {e}")
+            return
+        self.scheduler.store(index, frame, signature)
+        self.publisher.publish(index, self.slides[index].name, frame)
+        print(f"スライド{index}を配信しました: {self.slides[index].name}")
+
+    def on_file_changed(self, path):
+        print(f"{path} が変更されました")
+        for index in self.scheduler.affected_by(path):
+            self.scheduler.invalidate(index)
+        self.refresh()
+
+    def reload(self):
+        print("再読み込みします (SIGHUP)")
+        for index in range(len(self.slides)):
+            self.scheduler.invalidate(index)
+        self.refresh()
+
+    def shutdown(self):
+        print("描画サーバーを終了します")
+        self.loop.stop()
+
+
+def serve(host, port):
+    """描画サーバーモード: スライドを描画し、HTTPでフレームを配信する"""
+    from utils.frame_server import FramePublisher, start_frame_server
+    loop = EventLoop()
+    slides = build_slides()
+    publisher = FramePublisher()
+    publisher.set_slides([spec.name for spec in slides])  # 描き終わる前から、すべてのスライドを一覧に載せる
+    server = start_frame_server(publisher, host, port)
+    print(f"描画サーバーを起動しました: http://{host}:{server.server_address[1]}/frames")
+    render_server = RenderServer(loop, slides, publisher)
+
+    watched_files = sorted({f for spec in slides for f in spec.files})
+    watcher = FileWatcher(loop, watched_files, render_server.on_file_changed)
+    watcher.start()
+    loop.add_signal_handler(signal.SIGTERM, render_server.shutdown)
+    loop.add_signal_handler(signal.SIGHUP, render_server.reload)
+    try:
+        render_server.start()
+        loop.run_forever()
+    except KeyboardInterrupt:
+        print("描画サーバーを終了します")
+    finally:
+        watcher.stop()
+        server.shutdown()
+        server.server_close()
+        loop.close()
+
+
+def show_last_frame(epd, frame_store):
+    """前回、最後に内容が変わったフレームをすぐにパネルへ出す。表示したスライド番号を返す"""
+    latest = frame_store.latest()
+    if latest is None:
+        return None
+    index, packed, saved_at = latest
+    print(f"前回のフレームを表示します: スライド{index} ({time.strftime('%m/%d %H:%M', time.localtime(saved_at))})")
+    display_packed(epd, packed)
+    sleep_display(epd)
+    return index
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="E-Paper Multi-Slide Display")
+    parser.add_argument('--server', action='store_true',
+                        help="描画サーバーとして起動し、フレームをHTTPで配信する")
+    parser.add_argument('--host', default='0.0.0.0', help="描画サーバーの待ち受けアドレス")
+    parser.add_argument('--port', type=int, default=8080, help="描画サーバーのポート番号")
+    parser.add_argument('--client', metavar='URL',
+                        help="シンクライアントとして起動し、描画サーバー(例: http://192.168.1.10:8080)のフレームを表示する")
+    parser.add_argument('--simulate', type=float, metavar='DAYS',
+                        help="仮想時計と模擬ディスプレイで、DAYS日分の動作を数秒で再現する")
+    parser.add_argument('--simulate-output', default='simulation', metavar='DIR',
+                        help="シミュレーションのタイムラインとログの出力先")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="モジュールの読み込み時間と、最初のフレームを表示するまでの時間を表示する")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.profile_startup:
+        startup_profile.start()  # main(argv) として呼ばれた場合（通常は読み込み時に開始済み）
+    if args.server:
+        serve(args.host, args.port)
+        return
+    if args.simulate is not None:
+        # パネルもネットワークも使わず、仮想時間で同じ処理を動かす
+        from utils.simulation import Simulation
+        Simulation(args.simulate, output_dir=args.simulate_output).run(functools.partial(run_panel, args))
+        return
+    run_panel(args, EventLoop(), init_display)
+
+
+def run_panel(args, loop, open_display, on_event=None):
+    """パネルにスライドを表示し続ける（終了するまで戻らない）"""
+    epd = None
+    watcher = None
+    cadence = None
+    try:
+        # ディスプレイの初期化
+        epd = open_display()
+        startup_profile.mark("ディスプレイの初期化")
+
+        # スライドのモジュールやネットワークを読み込む前に、前回のフレームを表示しておく
+        frame_store = FrameStore(FRAME_STORE_DIR)
+        restored_index = show_last_frame(epd, frame_store)
+        if restored_index is not None:
+            startup_profile.mark("前回のフレームを表示")
+
+        # 時間帯・書き換えの予算・人の気配に応じて表示時間と書き換えの方法を決める
+        cadence_config = load_cadence_config()
+        if cadence_config:
+            cadence = CadenceController(cadence_config, REFRESH_INTERVAL, FULL_REFRESH_COUNT)
+
+        if args.client:
+            # シンクライアント: 描画はサーバーに任せ、フレームを取得して表示するだけ
+            from utils.frame_server import FrameClient
+            client = FrameClient(args.client)
+            slides = build_remote_slides(client)
+            show = SlideShow(loop, epd, slides, load_config(), render_func=fetch_frame,
+                             frame_store=frame_store, on_event=on_event, cadence=cadence)
+            watch_remote_slides(loop, client, show)
+        else:
+            slides = build_slides()
+            show = SlideShow(loop, epd, slides, load_config(), frame_store=frame_store,
+                             on_event=on_event, cadence=cadence)
+
+            # 設定ファイルが書き換えられたら、該当スライドをすぐに描き直す
+            watched_files = sorted({f for spec in slides for f in spec.files})
+            watcher = FileWatcher(loop, watched_files, show.on_file_changed)
+            watcher.start()
+        startup_profile.mark("スライドの準備")
+        if restored_index is not None:
+            show.resume(restored_index)
+        if cadence:
+            cadence.start(loop, show.wake)
+            cadence.report()
+
+        # SIGTERM: パネルを消去して終了 / SIGHUP: 再読み込み
+        loop.add_signal_handler(signal.SIGTERM, show.shutdown)
+        loop.add_signal_handler(signal.SIGHUP, show.reload)
+
+        show.start()
+        loop.run_forever()
+
+        epd.init()
+        clear_display(epd)
 
     except KeyboardInterrupt:
         print("プログラムを終了します")
-        white_image = Image.new('1', (epd.width, epd.height), 255)
-        epd.display(epd.getbuffer(white_image))
-        sleep_display(epd)
+        if epd:
+            epd.init()
+            clear_display(epd)
     except Exception as e:
         print(f"エラーが発生しました: {e}")
-        if 'epd' in locals() and epd:
+        if epd:
             sleep_display(epd)
+    finally:
+        if watcher:
+            watcher.stop()
+        if cadence:
+            cadence.stop(loop)
+        loop.close()
 
 if __name__ == "__main__":
     main()
@@ -1,5 +1,7 @@
 import calendar
+import collections
 import datetime
+import itertools
 import json
 import os
 from PIL import Image, ImageDraw, ImageFont
@@ -40,14 +42,19 @@ from PIL import Image, ImageDraw, ImageFont
 # - `load_schedule()`:
 #   予定が書かれた `schedule.json` ファイルを開けて、中身を読み込む係です。
 #
-# - `get_schedule_for_date()`:
-#   このスクリプトで最も重要な関数です。たくさんの予定の中から、指定された
-#   「たった一日分」の予定だけを正確に見つけ出す、腕利きの探偵のような役割です。
-#   月末に明日（翌月）の予定を探すという難しい任務も、この関数が解決してくれます。
+# - `get_schedule_index()`:
+#   このスクリプトで最も重要な関数です。予定表を「日付 -> その日の予定」と
+#   「年月 -> メンバー一覧」の索引（さくいん）にまとめておき、どの日の予定も
+#   すぐに引けるようにします。月末に明日（翌月）の予定を探すときも同じです。
+#   `schedule.json` が書き換えられたときだけ作り直します。
 #
-# - `get_available_font()`, `wrap_text()`:
-#   文字を描くためのフォントを探したり、長い予定を読みやすく改行したりする、
-#   アシスタント的な関数です。
+# - `get_day_tile()`:
+#   一日分のメンバーと予定を、一枚の小さな画像（タイル）として描いて覚えておく
+#   係です。同じ日・同じ予定なら、前に描いたタイルをそのまま使います。
+#
+# - `get_available_font()`, `wrap_text()`, `fit_name()`:
+#   文字を描くためのフォントを探したり、長い予定を読みやすく改行したり、
+#   列に入りきらない名前を折り返したり「…」で短くしたりする、アシスタント的な関数です。
 #
 #
 # STEP 3: メインの処理でカレンダー画像を組み立てる (`create_calendar_slide`)
@@ -58,21 +65,20 @@ from PIL import Image, ImageDraw, ImageFont
 #    - これから絵を描くための、まっ白な画像（キャンバス）を用意します。
 #
 # 2. 日付と予定を準備する
-#    - 「今日」と「明日」の日付を計算し、`schedule.json` から全データを読み込みます。
+#    - 表示する日付（「今日」と「明日」など）を計算し、`schedule.json` の索引を用意します。
 #
 # 3. キャンバスに描画していく
 #    - まず、"2025年7月 スケジュール" のようなタイトルを描きます。
-#    - 画面を左右二つに分け、「きょう」と「あす」のエリアを作ります。
+#    - 画面を日数分の列に分け、「きょう」と「あす」などのエリアを作ります。
 #    - それぞれのエリアに、以下の処理を行います。
 #
 #      a. 日付ヘッダーを描く
 #         - "きょう 31 (木)" のような、分かりやすいヘッダーを描きます。
 #
-#      b. その日の予定を探す
-#         - 腕利き探偵 `get_schedule_for_date()` を呼び出し、その日の予定と
-#           メンバーリストを正確に受け取ります。
+#      b. その日の予定を引く
+#         - 索引から、その日の予定とメンバーリストを受け取ります（`get_schedule_range()`）。
 #
-#      c. メンバーごとに予定を描く
+#      c. メンバーごとに予定を描く（`get_day_tile()` のタイルを貼る）
 #         - 家族メンバーを一人ずつ順番に見ていきます。
 #         - もし予定があれば、名前を**太字**で描き、その下に予定内容を書きます。
 #         - 予定がなければ、名前を普通の太さで描きます。
@@ -80,6 +86,11 @@ from PIL import Image, ImageDraw, ImageFont
 # 4. 完成！
 #    - すべて描き終わったら、完成したカレンダー画像を返します。
 #
+# ※ config.json の calendar_slide で、並べる日数 (days) や
+#    一週間表示 (view: "week") に切り替えられます。3日以上並べるときは
+#    小さめの文字になります。日ごとの列は画像として覚えておくので、
+#    日付が変わっても新しく見えるようになった日だけを描き直します。
+#
 #
 # STEP 4: テスト実行 (`if __name__ == "__main__":`)
 # --------------------------------------------
@@ -128,29 +139,204 @@ def wrap_text(text, font, max_width):
         lines.append(current_line)
     return lines
 
-def get_schedule_for_date(schedule_data, target_date):
+def fit_text(text, font, max_width):
+    """幅に収まらない文字列は、末尾を「…」にして収まる長さまで縮める"""
+    if font.getlength(text) <= max_width:
+        return text
+    while text and font.getlength(text + "…") > max_width:
+        text = text[:-1]
+    return text + "…"
+
+def fit_name(name, font, max_width, max_lines=2):
+    """メンバー名を幅に合わせて max_lines 行までに分ける（単語で折り返し、入りきらない分は「…」で縮める）"""
+    lines = wrap_text(name, font, max_width) or [""]
+    if len(lines) > max_lines:
+        lines = lines[:max_lines - 1] + [" ".join(lines[max_lines - 1:])]
+    return [fit_text(line, font, max_width) for line in lines]
+
+
+# --- 複数日表示のための設定と索引 ---
+
+# 画面に並べる日数が多いときは、小さめの文字とつめた行間を使う
+CALENDAR_STYLES = {
+    "normal": {"day_header": 36, "member": 24, "schedule": 22, "header_gap": 60,
+               "name_gap": 35, "line_gap": 30, "active_gap": 20, "inactive_gap": 55, "bar_height": 60,
+               "indent": 15},
+    "compact": {"day_header": 24, "member": 18, "schedule": 16, "header_gap": 40,
+                "name_gap": 24, "line_gap": 20, "active_gap": 12, "inactive_gap": 34, "bar_height": 40,
+                "indent": 6},
+}
+DEFAULT_MEMBERS = ["Member A", "Member B", "Member C", "Member D"]
+MAX_CACHED_TILES = 21   # 日ごとの描画結果を何日分まで覚えておくか
+INDICATOR_WIDTH = 5      # 予定ありを示すバーの幅
+
+_schedule_index_cache = None   # (パス, 更新日時, 索引)
+_tile_cache = collections.OrderedDict()  # 日ごとの描画結果（1bit画像）
+
+def load_calendar_config():
+    """設定ファイル(config.json)からカレンダースライドの設定を読み込む"""
+    try:
+        with open('config.json', 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        return config.get('calendar_slide', {})
+    except Exception:
+        return {} # エラーの場合は空の設定を返す
+
+def get_visible_dates(today, config):
     """
-    指定された日付のスケジュールエントリとメンバーリストを返す。
-    月をまたいでも正しく検索する。
+    表示する日付の一覧。
+    view="week" なら今週の月曜から日曜、そうでなければ今日から days 日分（既定は2日）。
     """
-    if not schedule_data:
-        return None, None
+    if config.get('view') == 'week':
+        monday = today - datetime.timedelta(days=today.weekday())
+        return [monday + datetime.timedelta(days=i) for i in range(7)]
+    days = max(1, min(7, config.get('days', 2)))
+    return [today + datetime.timedelta(days=i) for i in range(days)]
 
-    target_year = target_date.year
-    target_month = target_date.month
-    target_date_str = target_date.strftime("%Y-%m-%d")
-
-    # 該当する年月のデータブロックを検索
-    month_data = next((m for m in schedule_data if m.get("year") == target_year and m.get("month") == target_month), None)
-    
-    if not month_data:
-        return None, None
+def build_schedule_index(schedule_data):
+    """
+    スケジュールデータを日付ですぐ引けるように索引化する。
+    {"dates": {"2025-07-21": エントリ}, "months": {(2025, 7): メンバー一覧}}
+    """
+    index = {"dates": {}, "months": {}}
+    for month_data in schedule_data or []:
+        key = (month_data.get("year"), month_data.get("month"))
+        index["months"][key] = month_data.get("members", [])
+        for entry in month_data.get("schedules", []):
+            index["dates"][entry["date"]] = entry
+    return index
+
+def get_schedule_index(json_path):
+    """スケジュールの索引を返す（ファイルが更新されたときだけ読み直す）"""
+    global _schedule_index_cache
+    try:
+        mtime = os.stat(json_path).st_mtime_ns
+    except OSError:
+        mtime = None
+    if _schedule_index_cache and _schedule_index_cache[:2] == (json_path, mtime):
+        return _schedule_index_cache[2]
+    index = build_schedule_index(load_schedule(json_path))
+    _schedule_index_cache = (json_path, mtime, index)
+    return index
+
+def get_schedule_range(index, dates):
+    """日付の一覧それぞれについて (日付, エントリ, メンバー一覧) を返す"""
+    return [(date, index["dates"].get(date.strftime("%Y-%m-%d")),
+             index["months"].get((date.year, date.month)))
+            for date in dates]
+
+def active_block(name_lines, schedule_lines, style):
+    """予定ありのメンバー1人分の行と高さ（layout_member の戻り値と同じ形）"""
+    bottom = (len(name_lines) - 1 + len(schedule_lines)) * style["line_gap"] + style["name_gap"]
+    return True, name_lines, schedule_lines, max(bottom, style["bar_height"]), bottom + style["active_gap"]
+
+def layout_member(member, schedule_text, fonts, style, width):
+    """
+    メンバー1人分の行を組む。
+    (予定ありか, 名前の行, 予定の行, 文字の下端までの高さ, 次のメンバーまでの高さ) を返す
+    """
+    if schedule_text:
+        max_text_width = width - (INDICATOR_WIDTH + style["indent"])
+        return active_block(fit_name(member, fonts["member_active"], max_text_width),
+                            wrap_text(schedule_text, fonts["schedule"], max_text_width), style)
+    name_lines = fit_name(member, fonts["member_inactive"], width)
+    bottom = len(name_lines) * style["line_gap"]
+    return False, name_lines, [], bottom, bottom + style["inactive_gap"] - style["line_gap"]
+
+def shorten_member(block, room, fonts, style, width):
+    """予定を高さroomに入る行数まで減らし、最後の行を「…」で終える。1行も入らなければNone"""
+    active, name_lines, schedule_lines, _, _ = block
+    keep = (room - style["name_gap"]) // style["line_gap"] - (len(name_lines) - 1)
+    if not active or not 1 <= keep < len(schedule_lines):
+        return None
+    max_text_width = width - (INDICATOR_WIDTH + style["indent"])
+    lines = schedule_lines[:keep]
+    lines[-1] = fit_text(lines[-1] + "…", fonts["schedule"], max_text_width)
+    return active_block(name_lines, lines, style)
 
-    # その月のデータから該当日付のスケジュールを検索
-    schedule_entry = next((s for s in month_data.get("schedules", []) if s["date"] == target_date_str), None)
-    members = month_data.get("members", [])
-    
-    return schedule_entry, members
+def count_fitting(blocks, height, reserve):
+    """
+    上から何人分が高さheightに収まるか。
+    全員は入らないときは、「+N」の表示用に最後の reserve ピクセルを空けて数える
+    """
+    tops = list(itertools.accumulate((block[4] for block in blocks), initial=0))
+    if not blocks or tops[-2] + blocks[-1][3] <= height:
+        return len(blocks)
+    count = 0
+    while tops[count] + blocks[count][3] <= height - reserve:
+        count += 1
+    return count
+
+def render_day_tile(entry, members, fonts, style, width, height):
+    """
+    一日分のメンバーと予定を、幅width・高さheightの1bit画像に描く。
+    入りきらないときは、途中のメンバーの予定を「…」で打ち切り、
+    それでも描けなかったメンバーの人数を最後に「+N」で示す。
+    """
+    tile = Image.new('1', (width, height), 255)
+    draw = ImageDraw.Draw(tile)
+    current_y = 0
+
+    blocks = [layout_member(member, entry.get(member, "") if entry else "", fonts, style, width)
+              for member in members]
+    shown = count_fitting(blocks, height, style["line_gap"])
+    if shown < len(blocks):
+        # 途中で切れるメンバーは、入るところまで予定を描く
+        top = sum(block[4] for block in blocks[:shown])
+        reserve = style["line_gap"] if shown + 1 < len(blocks) else 0
+        shortened = shorten_member(blocks[shown], height - reserve - top, fonts, style, width)
+        if shortened:
+            blocks[shown] = shortened
+            shown += 1
+
+    # 各メンバーのスケジュールを描画
+    for active, name_lines, schedule_lines, _, advance in blocks[:shown]:
+        # 予定がある場合とない場合で、見た目を明確に変える
+        if active:
+            # 【予定あり】
+            # 左側にインジケータバーを描画
+            draw.rectangle([(0, current_y), (INDICATOR_WIDTH, current_y + style["bar_height"])], fill=0)
+
+            # メンバー名をボールドで描画
+            text_x = INDICATOR_WIDTH + style["indent"]
+            y = current_y
+            for line in name_lines:
+                draw.text((text_x, y), line, font=fonts["member_active"], fill=0)
+                y += style["line_gap"]
+            y += style["name_gap"] - style["line_gap"] # メンバー名と予定内容の間の余白
+
+            # 予定内容を折り返して描画
+            for line in schedule_lines:
+                draw.text((text_x, y), line, font=fonts["schedule"], fill=0)
+                y += style["line_gap"] # 予定の行間
+        else:
+            # 【予定なし】
+            # メンバー名を通常の太さで静かに表示
+            for i, line in enumerate(name_lines):
+                draw.text((0, current_y + i * style["line_gap"]), line, font=fonts["member_inactive"], fill=0)
+        current_y += advance # 次のメンバーとの間の余白を含む
+
+    # 入りきらなかった人数を下端に示す
+    if shown < len(blocks):
+        marker_y = min(current_y, height - style["line_gap"])
+        draw.text((0, marker_y), f"+{len(blocks) - shown}", font=fonts["member_active"], fill=0)
+    return tile
+
+def get_day_tile(date, entry, members, fonts, font_key, style_name, width, height):
+    """
+    一日分の画像を返す。同じ日・同じ予定・同じメンバー・同じフォントなら
+    前回描いた画像を使い回す（日付が変わっても、続けて表示される日は描き直さない）。
+    """
+    entry_items = tuple(sorted((k, v) for k, v in entry.items() if k != "date")) if entry else ()
+    key = (date, entry_items, tuple(members), font_key, style_name, width, height)
+    if key in _tile_cache:
+        _tile_cache.move_to_end(key)
+        return _tile_cache[key]
+    tile = render_day_tile(entry, members, fonts, CALENDAR_STYLES[style_name], width, height)
+    _tile_cache[key] = tile
+    if len(_tile_cache) > MAX_CACHED_TILES:
+        _tile_cache.popitem(last=False)
+    return tile
 
 
 # ===================================================================
@@ -160,6 +346,7 @@ def get_schedule_for_date(schedule_data, target_date):
 def create_calendar_slide():
     """
     視覚的階層と余白を重視したカレンダースライドを生成する。
+    日ごとの列は画像として覚えておき、変化のあった日だけを描き直す。
     """
     IMAGE_WIDTH = 800
     IMAGE_HEIGHT = 480
@@ -180,23 +367,28 @@ def create_calendar_slide():
         draw.text((20, 20), "Font not found.", fill=0)
         return image
 
-    # 階層を意識したフォントサイズ
-    font_title = ImageFont.truetype(font_regular, 24)
-    font_day_header = ImageFont.truetype(font_bold, 36)
-    font_member_active = ImageFont.truetype(font_bold, 24)
-    font_member_inactive = ImageFont.truetype(font_regular, 24) # 予定がないメンバー用
-    font_schedule = ImageFont.truetype(font_regular, 22)
-    font_small = ImageFont.truetype(font_regular, 16)
-
     # --- データ準備 ---
+    config = load_calendar_config()
     now = datetime.datetime.now()
     today = datetime.date.today()
-    tomorrow = today + datetime.timedelta(days=1)
-    two_days = [today, tomorrow]
+    dates = get_visible_dates(today, config)
+    style_name = "normal" if len(dates) <= 2 else "compact"
+    style = CALENDAR_STYLES[style_name]
+
+    # 階層を意識したフォントサイズ
+    font_title = ImageFont.truetype(font_regular, 24)
+    font_day_header = ImageFont.truetype(font_bold, style["day_header"])
+    font_small = ImageFont.truetype(font_regular, 16)
+    fonts = {
+        "member_active": ImageFont.truetype(font_bold, style["member"]),
+        "member_inactive": ImageFont.truetype(font_regular, style["member"]), # 予定がないメンバー用
+        "schedule": ImageFont.truetype(font_regular, style["schedule"]),
+    }
+    font_key = (font_regular, font_bold)
 
     try:
-        # スケジュールデータを最初に一括で読み込むだけにする
-        schedule_data = load_schedule('schedule.json')
+        # スケジュールの索引（ファイルが更新されたときだけ読み直す）
+        schedule_index = get_schedule_index('schedule.json')
 
         # --- 新しいレイアウトでの描画 ---
 
@@ -206,56 +398,45 @@ def create_calendar_slide():
 
         # 2. レイアウト設定値
         y_start = 90
-        column_width = 400
         padding = 40
-        indicator_width = 5 # 予定ありを示すバーの幅
+        if len(dates) == 2:
+            column_width = 400  # 「きょう」「あす」の2列は従来どおりの配置にする
+        else:
+            column_width = (IMAGE_WIDTH - padding) // len(dates)
+        tile_width = column_width - (padding if len(dates) <= 2 else 12)
+        body_y = y_start + style["header_gap"]
 
         weekday_names = ["月", "火", "水", "木", "金", "土", "日"]
+        relative_labels = {0: "きょう", 1: "あす"}
 
-        # 3. 「今日」と「明日」の2つのカラムを描画
-        for i, date in enumerate(two_days):
+        # 3. 日ごとの列を描画
+        for i, (date, schedule_entry, members) in enumerate(get_schedule_range(schedule_index, dates)):
             x_start = padding + i * column_width
-            current_y = y_start
-
-            # 日付ヘッダーを描画 (例: "きょう 24 (木)")
-            day_label = "きょう" if i == 0 else "あす"
-            day_str = f"{day_label} {date.day} ({weekday_names[date.weekday()]})"
-            draw.text((x_start, current_y), day_str, font=font_day_header, fill=0)
-            current_y += 60 # ヘッダー下の余白
+            offset = (date - today).days
+
+            # 日付ヘッダーを描画 (例: "きょう 24 (木)")。列の画像とは別に毎回描く
+            if style_name == "normal":
+                label = relative_labels.get(offset, "")
+                day_str = f"{label} {date.day} ({weekday_names[date.weekday()]})".strip()
+                draw.text((x_start, y_start), day_str, font=font_day_header, fill=0)
+            else:
+                day_str = f"{date.day}({weekday_names[date.weekday()]})"
+                if offset == 0:
+                    # 今日の列は白黒反転して目立たせる
+                    bbox = draw.textbbox((x_start, y_start), day_str, font=font_day_header)
+                    draw.rectangle((bbox[0] - 4, bbox[1] - 4, bbox[2] + 4, bbox[3] + 4), fill=0)
+                    draw.text((x_start, y_start), day_str, font=font_day_header, fill=255)
+                else:
+                    draw.text((x_start, y_start), day_str, font=font_day_header, fill=0)
 
-            # 新しいヘルパー関数を使い、日付ごとにスケジュールとメンバーを検索
-            schedule_entry, members = get_schedule_for_date(schedule_data, date)
-            
             # もしその日のデータがJSONになければ、デフォルトのメンバーリストを使う
             if not members:
-                members = ["Member A", "Member B", "Member C", "Member D"]
-
-            # 4. 各メンバーのスケジュールを描画
-            for member in members:
-                schedule_text = schedule_entry.get(member, "") if schedule_entry else ""
-
-                # 予定がある場合とない場合で、見た目を明確に変える
-                if schedule_text:
-                    # 【予定あり】
-                    # 左側にインジケータバーを描画
-                    draw.rectangle([(x_start, current_y), (x_start + indicator_width, current_y + 60)], fill=0)
-
-                    # メンバー名をボールドで描画
-                    draw.text((x_start + indicator_width + 15, current_y), member, font=font_member_active, fill=0)
-                    current_y += 35 # メンバー名と予定内容の間の余白
-
-                    # 予定内容を折り返して描画
-                    max_text_width = column_width - padding - (indicator_width + 15)
-                    schedule_lines = wrap_text(schedule_text, font_schedule, max_text_width)
-                    for line in schedule_lines:
-                        draw.text((x_start + indicator_width + 15, current_y), line, font=font_schedule, fill=0)
-                        current_y += 30 # 予定の行間
-                    current_y += 20 # 次のメンバーとの間の余白
-                else:
-                    # 【予定なし】
-                    # メンバー名を通常の太さで静かに表示
-                    draw.text((x_start, current_y), member, font=font_member_inactive, fill=0)
-                    current_y += 55 # 次のメンバーとの間の余白
+                members = DEFAULT_MEMBERS
+
+            # 4. 各メンバーのスケジュール（日ごとに覚えておいた画像を貼る）
+            tile = get_day_tile(date, schedule_entry, members, fonts, font_key, style_name,
+                                tile_width, IMAGE_HEIGHT - body_y)
+            image.paste(tile, (x_start, body_y))
 
     except Exception as e:
         draw.text((40, 40), "カレンダーの表示に失敗しました", font=font_day_header, fill=0)
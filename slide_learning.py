@@ -1,8 +1,12 @@
 import json
 import datetime
-import random
 import os
 from PIL import Image, ImageDraw, ImageFont
+from utils.learning_store import SqliteContentStore, TopicHistory, open_content_store, pick_daily_topic
+
+# --- コンテンツストアとその日のトピックのキャッシュ ---
+_content_stores = {}   # content_file -> JsonContentStore / SqliteContentStore
+_daily_topic_cache = None  # ((日付, 学年, ファイル, 更新日時), 結果)
 
 # --- ヘルパー関数 ---
 
@@ -29,38 +33,57 @@ def get_current_grade(entrance_year):
     grade = current_school_year - entrance_year + 1
     return max(1, min(3, grade))
 
-def load_learning_content(content_file):
-    """JSONファイルから学習コンテンツを読み込む"""
-    try:
-        with open(content_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except Exception as e:
-        print(f"学習コンテンツの読み込みエラー: {e}")
-        return None
+def get_content_store(content_file):
+    """学習コンテンツのストアを返す（ファイルごとに一つだけ作って使い回す）"""
+    if content_file not in _content_stores:
+        _content_stores[content_file] = open_content_store(content_file)
+    return _content_stores[content_file]
 
 def get_daily_topic(config):
-    """設定に基づいて、今日の学習トピックをランダムに一つ選ぶ"""
-    content = load_learning_content(config.get('content_file', 'learning_content.json'))
+    """設定に基づいて、今日の学習トピックを一つ選ぶ（同じ日なら常に同じトピック）"""
+    global _daily_topic_cache
+
+    store = get_content_store(config.get('content_file', 'learning_content.json'))
     entrance_year = config.get('entrance_year', 2022) # デフォルト値
     grade = get_current_grade(entrance_year)
     grade_key = f"grade{grade}"
+    today = datetime.date.today()
 
-    if not content or grade_key not in content:
+    # 同じ日・同じコンテンツなら、前回選んだ結果をそのまま返す
+    cache_key = (today, grade_key, store.content_file, store.version())
+    if _daily_topic_cache and _daily_topic_cache[0] == cache_key:
+        return _daily_topic_cache[1]
+
+    if not store.has_grade(grade_key):
         return None, None
 
-    weekday = datetime.datetime.now().weekday()
-    subjects = list(content[grade_key].keys())
+    weekday = today.weekday()
+    subjects = store.subjects(grade_key)
 
-    # ★★★ 以下の3行を追加 ★★★
     # もし科目が一つも登録されていなければ、エラーを返して終了
     if not subjects:
         return "エラー", {"title": "学習コンテンツエラー", "body": f"{grade_key}に科目が登録されていません。"}
 
     subject_key = subjects[weekday % len(subjects)]
-    topic = random.choice(content[grade_key][subject_key])
+
+    # no_repeat_days を設定すると、直近に表示したトピックを避けて選ぶ
+    # （SQLite版はストア自身が表示履歴を持ち、間隔反復で巡回する）
+    no_repeat = config.get('no_repeat_days', 0)
+    if isinstance(store, SqliteContentStore):
+        history = store
+    elif no_repeat:
+        history = TopicHistory(config.get('history_file', 'learning_history.json'))
+    else:
+        history = None
+    index = pick_daily_topic(store, today, grade_key, subject_key, history, no_repeat)
+    if index is None:
+        return None, None
+    topic = store.topic(grade_key, subject_key, index)
 
     subject_map = {"math": "数学", "science": "理科", "social": "社会", "english": "英語", "japanese": "国語"}
-    return subject_map.get(subject_key, "学習"), topic
+    result = (subject_map.get(subject_key, "学習"), topic)
+    _daily_topic_cache = (cache_key, result)
+    return result
 
 def wrap_text_by_width(text, font, max_width):
     """禁則処理を考慮して、テキストを描画幅に基づいて自動で折り返す"""
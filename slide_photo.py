@@ -0,0 +1,112 @@
+import collections
+import hashlib
+import json
+import os
+import time
+from PIL import Image, ImageDraw, ImageOps
+
+# ===================================================================
+# 家族の写真スライド
+# -------------------------------------------------------------------
+# config.json の photo_slide.directory にある写真を順番に表示します。
+#   - JPEGは「ドラフトモード」で読み込み、デコードの段階で画面サイズ
+#     (800×480) 近くまで縮小するので、大きな写真でも速く読み込めます。
+#   - 白黒への変換(ディザリング)はNumPyでまとめて計算します。
+#   - 変換結果は写真ファイルの内容(ハッシュ)ごとに保存しておくので、
+#     2回目以降は辞書を引くだけで済みます。
+# ===================================================================
+
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 480
+PHOTO_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+DEFAULT_CHANGE_INTERVAL = 3600  # 写真を切り替える間隔（秒）
+MAX_CACHED_PHOTOS = 32          # 変換済みの写真を何枚まで覚えておくか（1枚48KB）
+EXIF_ORIENTATION = 0x0112       # EXIFの「向き」タグ
+
+_digest_cache = {}   # (パス, 更新日時, サイズ) -> 内容のハッシュ
+_dither_cache = collections.OrderedDict()  # (ハッシュ, 方法) -> 1bit画像
+
+# --- ヘルパー関数 ---
+
+def load_config():
+    """設定ファイル(config.json)から写真スライドの設定を読み込む"""
+    try:
+        with open('config.json', 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        return config.get('photo_slide', {})
+    except Exception:
+        return {} # エラーの場合は空の設定を返す
+
+def list_photos(directory):
+    """フォルダ内の写真ファイルを名前順に返す"""
+    try:
+        names = sorted(os.listdir(directory))
+    except OSError as e:
+        print(f"写真フォルダの読み込みエラー: {e}")
+        return []
+    return [os.path.join(directory, name) for name in names if name.lower().endswith(PHOTO_EXTENSIONS)]
+
+def file_digest(path):
+    """写真ファイルの内容のハッシュ（ファイルが変わらない限り再計算しない）"""
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    if key not in _digest_cache:
+        with open(path, 'rb') as f:
+            _digest_cache[key] = hashlib.sha1(f.read()).hexdigest()
+    return _digest_cache[key]
+
+def load_photo(path):
+    """写真を読み込み、画面いっぱいに収まるグレースケール画像にする"""
+    with Image.open(path) as photo:
+        # JPEGならデコード時に縮小する（元の1/2, 1/4, 1/8のうち画面より大きい最小のサイズ）。
+        # 縦横を入れ替えて保存された写真（EXIFの向きが5〜8）は、回転後に画面を覆えるよう縦横を逆にして縮小する
+        if photo.getexif().get(EXIF_ORIENTATION) in (5, 6, 7, 8):
+            photo.draft('L', (SCREEN_HEIGHT, SCREEN_WIDTH))
+        else:
+            photo.draft('L', (SCREEN_WIDTH, SCREEN_HEIGHT))
+        photo = ImageOps.exif_transpose(photo)
+        gray = photo.convert('L')
+    return ImageOps.fit(gray, (SCREEN_WIDTH, SCREEN_HEIGHT), Image.Resampling.LANCZOS)
+
+def get_dithered_photo(path, method):
+    """写真を1bitに変換したものを返す。変換済みならキャッシュから返す"""
+    key = (file_digest(path), method)
+    if key in _dither_cache:
+        _dither_cache.move_to_end(key)
+        return _dither_cache[key]
+    from utils.dither import dither  # NumPyは写真スライドを使うときだけ読み込む
+    image = dither(load_photo(path), method)
+    _dither_cache[key] = image
+    if len(_dither_cache) > MAX_CACHED_PHOTOS:
+        _dither_cache.popitem(last=False)
+    return image
+
+def choose_photo(photos, interval, now=None):
+    """一定時間ごとに次の写真へ進む（状態を持たないので再起動しても同じ順番）"""
+    now = time.time() if now is None else now
+    return photos[int(now // interval) % len(photos)]
+
+# --- メインの描画関数 ---
+
+def create_photo_slide():
+    """写真スライドを生成する"""
+    config = load_config()
+    photos = list_photos(config.get('directory', 'photos'))
+    if not photos:
+        image = Image.new('1', (SCREEN_WIDTH, SCREEN_HEIGHT), 255)
+        ImageDraw.Draw(image).text((10, 10), "No photos found.", fill=0)
+        return image
+
+    path = choose_photo(photos, config.get('change_interval', DEFAULT_CHANGE_INTERVAL))
+    return get_dithered_photo(path, config.get('dither', 'ordered'))
+
+if __name__ == '__main__':
+    # このスクリプト単体で実行した際のテスト用
+    # config.jsonのphoto_slide.directoryに写真を置いてください
+    start = time.perf_counter()
+    photo_image = create_photo_slide()
+    print(f"1回目: {time.perf_counter() - start:.2f}秒")
+    start = time.perf_counter()
+    create_photo_slide()
+    print(f"2回目: {time.perf_counter() - start:.4f}秒")
+    photo_image.save("photo_test.png")
@@ -9,14 +9,14 @@
 # これから使う様々な機能を、外部の「ライブラリ」から読み込みます。
 # ===================================================================
 import os
-import requests
 from datetime import datetime
-from dotenv import load_dotenv
 from PIL import Image, ImageDraw, ImageFont, ImageChops
+from utils.glyph_cache import get_glyph_cache, TEMPERATURE_CHARS
+from utils.weather_api import CACHE_DURATION, effective_ttl, fetch_weather
+from utils.weather_history import get_weather_history, draw_sparkline
 import time
 import io
 import json
-import cairosvg
 
 # ===================================================================
 # 2. 定数とグローバル変数の設定
@@ -24,10 +24,6 @@ import cairosvg
 # プログラム全体で使う、変わらない値（定数）や設定をここで定義します。
 # ===================================================================
 
-# .envファイルに記述されたシークレット情報（APIキーなど）を読み込む
-load_dotenv()
-API_KEY = os.getenv("OPENWEATHERMAP_API_KEY") # .envファイルからAPIキーを取得
-
 # --- 表示とレイアウト関連 ---
 SCREEN_WIDTH = 800       # e-paperディスプレイの幅（ピクセル）
 SCREEN_HEIGHT = 480      # e-paperディスプレイの高さ（ピクセル）
@@ -37,11 +33,16 @@ ICON_PATH = os.path.join(os.path.dirname(__file__), 'icons')
 FONT_CANDIDATES = [os.path.join(os.path.dirname(__file__), 'fonts', 'ReggaeOne-Regular.ttf')]
 FONT_BOLD_CANDIDATES = [os.path.join(os.path.dirname(__file__), 'fonts', 'ReggaeOne-Regular.ttf')]
 
+# --- 気温の推移（スパークライン）関連 ---
+HISTORY_KEY = 'loc1'        # 履歴ファイル名に使うロケーションの識別子
+SPARKLINE_HOURS = 24     # スパークラインに表示する時間の範囲
+
 # --- キャッシュ機能関連 ---
 # このロケーション1専用のキャッシュを保存するためのグローバル変数
 _weather_cache_loc1 = None
 _cache_timestamp_loc1 = 0
-CACHE_DURATION = 1800    # キャッシュの有効期間（秒）。1800秒 = 30分
+# キャッシュの有効期間は utils/weather_api.py の CACHE_DURATION（天気スライド共通）
+REQUEST_TIMEOUT = 15     # APIの応答を待つ最長時間（秒）。止まったままにならないように
 
 # ===================================================================
 # 3. ヘルパー関数定義
@@ -67,15 +68,9 @@ def get_available_font(font_list):
     return None
 
 def get_weather_data(lat, lon):
-    """緯度(lat)と経度(lon)に基づいてAPIから天気データを取得する"""
-    try:
-        current_url = f"https://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&appid={API_KEY}&units=metric&lang=en"
-        current_response = requests.get(current_url); current_response.raise_for_status()
-        forecast_url = f"https://api.openweathermap.org/data/2.5/forecast?lat={lat}&lon={lon}&appid={API_KEY}&units=metric&lang=en"
-        forecast_response = requests.get(forecast_url); forecast_response.raise_for_status()
-        return {"current": current_response.json(), "forecast": forecast_response.json()}
-    except requests.exceptions.RequestException as e:
-        print(f"APIリクエストエラー: {e}"); return None
+    """緯度(lat)と経度(lon)に基づいてAPIから天気データを取得する（呼び出し回数は共通の管理下）"""
+    # APIキーは .env から、最初に取得するときに読み込まれる
+    return fetch_weather(lat, lon, timeout=REQUEST_TIMEOUT)
 
 def process_weather_data(data, city_name):
     """APIから取得した生のデータを、画面表示に使いやすい形に整理・加工する"""
@@ -110,6 +105,7 @@ def create_celsius_icon(height):
     svg_path = os.path.join(os.path.dirname(__file__), 'weather-crow5.7', 'svg', 'degree', 'degrees.svg')
     if not os.path.exists(svg_path): return None
     try:
+        import cairosvg  # 読み込みに時間がかかるので、SVGを変換するときだけ読み込む
         # SVGを指定された高さでPNGデータに変換
         png_data = cairosvg.svg2png(url=svg_path, output_height=height * 5)
         # PNGデータをグレースケール画像として読み込み
@@ -123,6 +119,16 @@ def create_celsius_icon(height):
     except Exception as e:
         print(f"摂氏アイコンの処理エラー: {e}"); return None
 
+def record_history(raw_data, weather_data, now):
+    """取得した天気データを履歴に追加する（追加のAPI呼び出しはしない）"""
+    try:
+        current = raw_data['current']
+        pop = weather_data['hourly'][0]['pop'] if weather_data['hourly'] else 0
+        get_weather_history(HISTORY_KEY).append(
+            current.get('dt', now), current['main']['temp'], current['main']['humidity'], pop)
+    except (OSError, KeyError) as e:
+        print(f"天気履歴の記録エラー: {e}")
+
 # ===================================================================
 # 4. メインの描画関数
 # -------------------------------------------------------------------
@@ -144,7 +150,8 @@ def create_weather_slide_loc1():
     # --- 2. 天気データの取得（キャッシュを賢く利用） ---
     now = time.time()
     weather_data = None
-    if _weather_cache_loc1 and (now - _cache_timestamp_loc1 < CACHE_DURATION):
+    # APIの残り回数が少ないときは、キャッシュの有効期間が自動的に延びる
+    if _weather_cache_loc1 and (now - _cache_timestamp_loc1 < effective_ttl(CACHE_DURATION)):
         print(f"{city_name}: 天気データをキャッシュから使用します。")
         weather_data = _weather_cache_loc1
         weather_data['last_updated'] = datetime.now().strftime("%b %d, %H:%M")
@@ -155,6 +162,11 @@ def create_weather_slide_loc1():
             weather_data = process_weather_data(raw_data, city_name)
             _weather_cache_loc1 = weather_data
             _cache_timestamp_loc1 = now
+            record_history(raw_data, weather_data, now)
+        elif _weather_cache_loc1:
+            # 取得できなかったときは、古くても前回のデータを使う
+            print(f"{city_name}: 取得できなかったため、前回のデータを使用します。")
+            weather_data = _weather_cache_loc1
     
     # --- 3. 描画の準備 ---
     image = Image.new('1', (SCREEN_WIDTH, SCREEN_HEIGHT), 255); draw = ImageDraw.Draw(image)
@@ -165,9 +177,10 @@ def create_weather_slide_loc1():
         
     try:
         # --- 4. 使用するフォントの種類を定義 ---
-        font_city_large = ImageFont.truetype(regular_font, 108)
+        # 大きな文字（頭文字と現在気温）は、グリフキャッシュで描く
+        font_city_large = get_glyph_cache(regular_font, 108)
         font_city_regular = ImageFont.truetype(regular_font, 36)
-        font_temp = ImageFont.truetype(bold_font, 168)
+        font_temp = get_glyph_cache(bold_font, 168, preload=TEMPERATURE_CHARS)
         font_desc = ImageFont.truetype(regular_font, 32)
         font_detail = ImageFont.truetype(regular_font, 26)
         font_hourly_time = ImageFont.truetype(regular_font, 28)
@@ -194,7 +207,7 @@ def create_weather_slide_loc1():
     total_width = fl_width + rot_width; start_x = left_center_x - (total_width // 2)
     fl_ascent, _ = font_city_large.getmetrics(); rot_ascent, _ = font_city_regular.getmetrics()
     y_offset_for_large_letter = rot_ascent - fl_ascent
-    draw.text((start_x, city_y + y_offset_for_large_letter), first_letter, font=font_city_large, fill=0)
+    font_city_large.draw(image, (start_x, city_y + y_offset_for_large_letter), first_letter)
     draw.text((start_x + fl_width, city_y), rest_of_text, font=font_city_regular, fill=0)
     
     # メインの天気アイコン
@@ -203,7 +216,7 @@ def create_weather_slide_loc1():
         
     # 現在気温
     temp_text = f"{weather_data['current']['temp']}"; temp_bbox = font_temp.getbbox(temp_text)
-    draw.text((left_center_x - (temp_bbox[2] - temp_bbox[0]) // 2, temp_y), temp_text, font=font_temp, fill=0)
+    font_temp.draw(image, (left_center_x - (temp_bbox[2] - temp_bbox[0]) // 2, temp_y), temp_text)
 
     # 摂氏アイコン
     if celsius_icon := create_celsius_icon(height=80):
@@ -235,6 +248,13 @@ def create_weather_slide_loc1():
     # 下揃えのテキスト（天気概況と湿度）
     bottom_align_y = details_y_start + 60
     draw.text((right_column_x_start, bottom_align_y + font_detail.getmetrics()[1]), f"Humidity {weather_data['current']['humidity']}%", font=font_detail, fill=0, anchor="lb")
+
+    # 直近24時間の気温の推移（スパークライン）
+    try:
+        history = get_weather_history(HISTORY_KEY).since(time.time() - SPARKLINE_HOURS * 3600)
+        draw_sparkline(draw, (right_column_x_end - 110, details_y_start + 4, right_column_x_end, bottom_align_y), history)
+    except OSError as e:
+        print(f"天気履歴の読み込みエラー: {e}")
     # draw.text((left_center_x, bottom_align_y + font_desc.getmetrics()[1]), weather_data['current']['description'], font=font_desc, fill=0, anchor="mb")
     
     # 最終的に完成した画像を返す
@@ -0,0 +1,123 @@
+import collections
+import json
+import os
+import threading
+import time
+
+# ===================================================================
+# APIの呼び出し回数の管理
+# -------------------------------------------------------------------
+# エンドポイントごとに、直近1分間と直近24時間の呼び出し回数を数えます。
+# 残りの回数が少なくなるほどキャッシュの有効期間を延ばし、
+# 無料枠の上限を超えないようにします。回数はファイルに保存するので、
+# 再起動しても正しく数え続けられます。
+# ===================================================================
+
+MINUTE = 60
+DAY = 24 * 60 * 60
+
+
+class RequestBudget:
+    """エンドポイントごとの呼び出し回数を数え、上限に近づいたら知らせる"""
+
+    def __init__(self, state_file, per_minute=60, per_day=1000, clock=None):
+        self.state_file = state_file
+        self.per_minute = per_minute
+        self.per_day = per_day
+        self.clock = clock or time.time
+        self._lock = threading.Lock()
+        self._calls = collections.defaultdict(collections.deque)  # endpoint -> 呼び出し時刻
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        cutoff = self.clock() - DAY
+        for endpoint, timestamps in state.get('calls', {}).items():
+            self._calls[endpoint].extend(t for t in timestamps if t > cutoff)
+
+    def _save(self):
+        state = {'calls': {endpoint: list(calls) for endpoint, calls in self._calls.items()}}
+        try:
+            tmp_path = self.state_file + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_file)
+        except OSError as e:
+            print(f"API呼び出し回数の保存エラー: {e}")
+
+    def _prune(self, now):
+        cutoff = now - DAY
+        for calls in self._calls.values():
+            while calls and calls[0] <= cutoff:
+                calls.popleft()
+
+    def usage(self, endpoint):
+        """(直近1分間の回数, 直近24時間の回数)"""
+        with self._lock:
+            now = self.clock()
+            self._prune(now)
+            calls = self._calls.get(endpoint, ())
+            return sum(1 for t in calls if t > now - MINUTE), len(calls)
+
+    def allow(self, endpoint, calls=1):
+        """あとcalls回呼び出しても上限を超えないならTrue"""
+        per_minute, per_day = self.usage(endpoint)
+        return per_minute + calls <= self.per_minute and per_day + calls <= self.per_day
+
+    def record(self, endpoint):
+        with self._lock:
+            now = self.clock()
+            self._calls[endpoint].append(now)
+            self._prune(now)
+            self._save()
+
+    def remaining_ratio(self):
+        """最も使われているエンドポイントの、1日の残り回数の割合 (0.0〜1.0)"""
+        with self._lock:
+            self._prune(self.clock())
+            used = max((len(calls) for calls in self._calls.values()), default=0)
+        return max(0.0, 1.0 - used / self.per_day)
+
+    def stretch(self, ttl, max_factor=8):
+        """
+        残りが半分を切ったら、キャッシュの有効期間を延ばす。
+        残り50%で1倍、25%で2倍、12.5%で4倍…（最大max_factor倍）
+        """
+        ratio = self.remaining_ratio()
+        if ratio >= 0.5:
+            return ttl
+        return ttl * min(max_factor, 0.5 / max(ratio, 0.5 / max_factor))
+
+
+class Coalescer:
+    """同じキーへの同時のリクエストを1回にまとめ、結果を共有する"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight = {}  # key -> (Event, 結果を入れるリスト)
+
+    def run(self, key, func):
+        with self._lock:
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                inflight = (threading.Event(), [])
+                self._inflight[key] = inflight
+                owner = True
+            else:
+                owner = False
+        event, result = inflight
+        if not owner:
+            # 先に始まったリクエストの結果を待つ
+            event.wait()
+            return result[0] if result else None
+        try:
+            result.append(func())
+            return result[0]
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            event.set()
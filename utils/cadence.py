@@ -0,0 +1,231 @@
+import datetime
+import json
+import os
+import socket
+import time
+
+from utils.epaper import REFRESH_SECONDS
+
+# ===================================================================
+# 書き換えの間隔と方法の調整（ケイデンス）
+# -------------------------------------------------------------------
+# 時間帯や人の気配に合わせて、スライドの表示時間と書き換えの方法を決めます。
+#   - quiet_hours         : 夜間など。表示時間を quiet_interval 秒に延ばし、
+#                           黒→白の書き換えを省いた「fast」で表示する
+#   - daily_refresh_budget: 1日にパネルを書き換えてよい回数（黒・白の塗りつぶしも数える）。
+#                           残りが足りなくなりそうなら fast に切り替え、表示時間を延ばす
+#   - presence_file / presence_socket:
+#                           人感センサーなどからの「人がいる」合図。ファイルの更新日時か、
+#                           UNIXソケットへのメッセージで伝える。idle_after 秒合図がなければ
+#                           表示を止め、パネルを眠らせたままにする
+# 1日ごとに実際の書き換え回数とパネルの稼働時間を数え、見積もりと一緒に表示します。
+# ===================================================================
+
+DAY = 24 * 60 * 60
+MINUTES_PER_DAY = 24 * 60
+REFRESH_MODES = ('auto', 'full', 'fast')
+FULL_CYCLE_REFRESHES = 2  # 完全リフレッシュ（黒→白）の書き換え回数
+MODE_REFRESHES = {'full': 3, 'fast': 1}  # 1回の表示でパネルを書き換える回数
+
+
+def load_config():
+    """設定ファイル(config.json)から書き換えの調整の設定を読み込む"""
+    try:
+        with open('config.json', 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        return config.get('cadence', {})
+    except Exception:
+        return {} # エラーの場合は空の設定を返す
+
+
+def parse_quiet_hours(ranges):
+    """["23:00-06:30", ...] を [(開始の分, 終了の分), ...] にする（日をまたいでもよい）"""
+    parsed = []
+    for text in ranges:
+        start, end = (datetime.datetime.strptime(part.strip(), '%H:%M') for part in text.split('-'))
+        parsed.append((start.hour * 60 + start.minute, end.hour * 60 + end.minute))
+    return parsed
+
+
+class CadenceController:
+    """時間帯・書き換えの予算・人の気配から、表示時間と書き換えの方法を決める"""
+
+    def __init__(self, config, base_interval, full_refresh_count, clock=None):
+        self.base_interval = base_interval
+        self.full_refresh_count = full_refresh_count
+        self.clock = clock or time.time
+        self.quiet_hours = parse_quiet_hours(config.get('quiet_hours', []))
+        # 1日の各分が静かな時間帯かどうかと、その分から日付が変わるまでの静かでない分数
+        self._quiet = [self._is_quiet_minute(m) for m in range(MINUTES_PER_DAY)]
+        self._active_after = [0] * (MINUTES_PER_DAY + 1)
+        for m in range(MINUTES_PER_DAY - 1, -1, -1):
+            self._active_after[m] = self._active_after[m + 1] + (not self._quiet[m])
+        self.quiet_interval = config.get('quiet_interval', 3600)
+        self.daily_budget = config.get('daily_refresh_budget')
+        self.mode = config.get('refresh_mode', 'auto')
+        if self.mode not in REFRESH_MODES:
+            raise ValueError(f"未対応の書き換え方法です: {self.mode}")
+        self.presence_file = config.get('presence_file')
+        self.presence_socket = config.get('presence_socket')
+        self.idle_after = config.get('idle_after', 1800)
+
+        self.on_presence = None
+        self._socket = None
+        self._last_presence = self.clock()  # 起動直後は人がいるものとして扱う
+        self._day = self._date(self.clock())
+        self.refreshes_today = 0
+        self.active_seconds_today = 0.0
+
+    @staticmethod
+    def _date(now):
+        return datetime.date.fromtimestamp(now)
+
+    # --- 時間帯 ---
+
+    def _is_quiet_minute(self, minute):
+        for start, end in self.quiet_hours:
+            if start <= end:
+                if start <= minute < end:
+                    return True
+            elif minute >= start or minute < end:
+                return True
+        return False
+
+    @staticmethod
+    def _minute_of_day(now):
+        local = time.localtime(now)
+        return local.tm_hour * 60 + local.tm_min, local.tm_sec
+
+    def in_quiet_hours(self, now):
+        return self._quiet[self._minute_of_day(now)[0]]
+
+    def active_seconds_left(self, now):
+        """今日の残り時間のうち、静かな時間帯を除いた秒数"""
+        minute, second = self._minute_of_day(now)
+        current = 0 if self._quiet[minute] else 60 - second
+        return current + self._active_after[minute + 1] * 60
+
+    # --- 表示時間と書き換えの方法 ---
+
+    def plan(self):
+        """次の表示について (表示時間[秒], 書き換えの方法 'full'/'fast') を返す"""
+        now = self.clock()
+        self._roll_over(now)
+        return self._plan(now, self.refreshes_today)
+
+    def _plan(self, now, used):
+        mode = 'full' if self.mode == 'auto' else self.mode
+        if self.in_quiet_hours(now):
+            return max(self.base_interval, self.quiet_interval), 'fast' if self.mode == 'auto' else mode
+        if not self.daily_budget:
+            return self.base_interval, mode
+
+        remaining = self.daily_budget - used
+        left = self.active_seconds_left(now)
+        if remaining <= 0:
+            # 今日の分は使い切ったので、日付が変わるまで書き換えない
+            midnight = time.mktime((self._date(now) + datetime.timedelta(days=1)).timetuple())
+            return max(self.base_interval, midnight - now + 1), mode
+
+        # 残りの回数を残りの時間に均等に配分する（完全リフレッシュの分も平均して含める）
+        periodic = FULL_CYCLE_REFRESHES / self.full_refresh_count
+        full_interval = left * (MODE_REFRESHES['full'] + periodic) / remaining
+        if self.mode == 'full' or (self.mode == 'auto' and full_interval <= self.base_interval):
+            return max(self.base_interval, full_interval), 'full'
+        fast_interval = left * (MODE_REFRESHES['fast'] + periodic) / remaining
+        return max(self.base_interval, fast_interval), 'fast'
+
+    # --- 人の気配 ---
+
+    def start(self, loop, on_presence=None):
+        """presence_socket が設定されていれば、ソケットで合図を待ち受ける"""
+        self.on_presence = on_presence
+        if not self.presence_socket:
+            return
+        try:
+            if os.path.exists(self.presence_socket):
+                os.unlink(self.presence_socket)
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self._socket.bind(self.presence_socket)
+            self._socket.setblocking(False)
+            loop.add_reader(self._socket.fileno(), self._on_socket)
+        except OSError as e:
+            print(f"人感ソケットを開けません: {e}")
+            self._socket = None
+
+    def stop(self, loop):
+        if self._socket is not None:
+            loop.remove_reader(self._socket.fileno())
+            self._socket.close()
+            self._socket = None
+            try:
+                os.unlink(self.presence_socket)
+            except OSError:
+                pass
+
+    def _on_socket(self):
+        try:
+            while self._socket.recv(64):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+        self.mark_presence()
+
+    def mark_presence(self):
+        self._last_presence = self.clock()
+        if self.on_presence:
+            self.on_presence()
+
+    def idle(self):
+        """人の気配の合図が idle_after 秒以上なければTrue（合図を設定していなければ常にFalse）"""
+        if not (self.presence_file or self.presence_socket):
+            return False
+        last = self._last_presence
+        if self.presence_file:
+            try:
+                last = max(last, os.stat(self.presence_file).st_mtime)
+            except OSError:
+                pass
+        return self.clock() - last >= self.idle_after
+
+    # --- 記録と見積もり ---
+
+    def record(self, refreshes, seconds):
+        """パネルを書き換えた回数と、パネルが起きていた時間を記録する"""
+        self._roll_over(self.clock())
+        self.refreshes_today += refreshes
+        self.active_seconds_today += seconds
+
+    def _roll_over(self, now):
+        day = self._date(now)
+        if day != self._day:
+            print(f"{self._day}: 書き換え {self.refreshes_today}回, "
+                  f"パネル稼働 {self.active_seconds_today / 60:.1f}分")
+            self._day = day
+            self.refreshes_today = 0
+            self.active_seconds_today = 0.0
+
+    def estimate_day(self, day=None):
+        """
+        人が常にいて、毎回スライドの内容が変わるとした場合の、
+        1日の (書き換え回数, パネル稼働時間[秒]) の見積もり（上限の目安）。
+        書き換え1回にREFRESH_SECONDS秒かかるものとして計算する。
+        """
+        day = day or self._date(self.clock())
+        now = time.mktime(day.timetuple())
+        end = now + DAY
+        used = displays = 0
+        while now < end:
+            interval, mode = self._plan(now, used)
+            cost = MODE_REFRESHES[mode]
+            displays += 1
+            if displays % self.full_refresh_count == 0:
+                cost += FULL_CYCLE_REFRESHES
+            used += cost
+            now += interval + cost * REFRESH_SECONDS
+        return used, used * REFRESH_SECONDS
+
+    def report(self):
+        refreshes, seconds = self.estimate_day()
+        print(f"書き換えの見積もり: 1日 約{refreshes}回, パネル稼働 約{seconds / 60:.0f}分 "
+              f"（今日はここまで {self.refreshes_today}回, {self.active_seconds_today / 60:.1f}分）")
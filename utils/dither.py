@@ -0,0 +1,76 @@
+import numpy as np
+from PIL import Image
+
+# ===================================================================
+# ディザリング（グレースケール -> 白黒1bit）
+# -------------------------------------------------------------------
+# PILのFloyd–Steinbergは1画素ずつ処理するため、写真全体に使うと
+# Pi Zeroでは時間がかかりすぎます。ここではNumPyでまとめて計算します。
+#
+#   - ordered (Bayer) : しきい値の表を敷き詰めて比較するだけ。最速
+#   - floyd_steinberg : 誤差拡散。同じ「波面」(x + 2y が等しい画素)は
+#                       互いに依存しないので、波面ごとにまとめて処理する
+# ===================================================================
+
+METHODS = ('ordered', 'floyd_steinberg')
+
+
+def bayer_matrix(n=8):
+    """n×n (nは2のべき乗) のBayer行列を 0〜1 のしきい値として返す"""
+    matrix = np.array([[0, 2], [3, 1]], dtype=np.float32)
+    while matrix.shape[0] < n:
+        matrix = np.block([[4 * matrix, 4 * matrix + 2],
+                           [4 * matrix + 3, 4 * matrix + 1]])
+    return (matrix + 0.5) / matrix.size
+
+
+def ordered_dither(gray, n=8):
+    """組織的ディザ。gray は uint8 の2次元配列。白の画素がTrueの配列を返す"""
+    height, width = gray.shape
+    threshold = bayer_matrix(n)
+    tiled = np.tile(threshold, (height // n + 1, width // n + 1))[:height, :width]
+    return gray.astype(np.float32) / 255.0 > tiled
+
+
+def error_diffusion_dither(gray):
+    """Floyd–Steinbergの誤差拡散。白の画素がTrueの配列を返す"""
+    height, width = gray.shape
+    # 右端・左端・下端への拡散を境界チェックなしで書けるよう、周囲に余白を付ける
+    work = np.zeros((height + 1, width + 2), dtype=np.float32)
+    work[:height, 1:width + 1] = gray
+    out = np.zeros((height, width), dtype=bool)
+
+    ys_all = np.arange(height)
+    for t in range(width + 2 * (height - 1)):
+        # この波面に含まれる画素 (y, x = t - 2y)
+        xs = t - 2 * ys_all
+        valid = (xs >= 0) & (xs < width)
+        ys = ys_all[valid]
+        if ys.size == 0:
+            continue
+        xs = xs[valid]
+        cols = xs + 1  # 余白の分ずらす
+
+        old = work[ys, cols]
+        white = old >= 128
+        out[ys, xs] = white
+        error = old - np.where(white, 255.0, 0.0)
+
+        # 誤差を右・左下・下・右下に分配する（各対象はこの波面より後に処理される）
+        work[ys, cols + 1] += error * (7 / 16)
+        work[ys + 1, cols - 1] += error * (3 / 16)
+        work[ys + 1, cols] += error * (5 / 16)
+        work[ys + 1, cols + 1] += error * (1 / 16)
+    return out
+
+
+def dither(image, method='ordered'):
+    """PILの画像を指定の方法で1bit画像に変換する"""
+    gray = np.asarray(image.convert('L'))
+    if method == 'ordered':
+        bits = ordered_dither(gray)
+    elif method == 'floyd_steinberg':
+        bits = error_diffusion_dither(gray)
+    else:
+        raise ValueError(f"未対応のディザリング方法です: {method}")
+    return Image.fromarray(bits)
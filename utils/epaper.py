@@ -1,21 +1,29 @@
-from waveshare_epd import epd4in26
-from PIL import Image  # PILのImageモジュールを直接インポート
+import time
+
+# このモジュールはPILを読み込まない（前回のフレームをすぐ表示できるように）。
+# 塗りつぶし用のバッファは epd.getbuffer() と同じ1bitのバイト列を直接作る
+
+REFRESH_SECONDS = 4.0  # パネルの全面書き換え1回にかかるおおよその時間（秒）。模擬ディスプレイ用
 
 def init_display():
     """e-Paperディスプレイを初期化"""
+    # 描画サーバーなどパネルのないマシンでも読み込めるよう、ドライバはここで読み込む
+    from waveshare_epd import epd4in26
     epd = epd4in26.EPD()
     epd.init()
     return epd
 
+def fill_buffer(epd, white):
+    """パネル全体を黒(white=False)または白で塗りつぶすバッファ"""
+    return bytearray([0xFF if white else 0x00]) * ((epd.width + 7) // 8 * epd.height)
+
 def full_refresh_cycle(epd):
     """完全なリフレッシュサイクル（黒→白→表示）を実行"""
     # ディスプレイを黒で塗りつぶし
-    black_image = Image.new('1', (epd.width, epd.height), 0)  # PILのImageを使用
-    epd.display(epd.getbuffer(black_image))
+    epd.display(fill_buffer(epd, white=False))
     
     # ディスプレイを白で塗りつぶし
-    white_image = Image.new('1', (epd.width, epd.height), 255)  # PILのImageを使用
-    epd.display(epd.getbuffer(white_image))
+    epd.display(fill_buffer(epd, white=True))
 
 def display_image(epd, image):
     """画像をe-Paperディスプレイに表示"""
@@ -25,6 +33,78 @@ def display_image(epd, image):
     # その後に画像を表示
     epd.display(epd.getbuffer(image))
 
+def pack_image(image):
+    """画像をe-Paperにそのまま送れる1bitのバイト列にする（epd.getbuffer()と同じ形式）"""
+    return bytes(image.convert('1').tobytes('raw'))
+
+def display_packed(epd, packed, mode='full'):
+    """
+    パック済みのフレームをe-Paperディスプレイに表示。
+    mode='full' は黒→白→表示の3回書き換え、'fast' は黒→白を省いて1回だけ書き換える
+    （残像が残りやすいので、ときどき full_refresh_cycle と組み合わせる）
+    """
+    if mode == 'full':
+        full_refresh_cycle(epd)
+    epd.display(bytearray(packed))
+
 def sleep_display(epd):
     """ディスプレイをスリープモードに"""
     epd.sleep()
+
+def clear_display(epd):
+    """ディスプレイを白で消去してからスリープさせる（終了時用）"""
+    epd.display(fill_buffer(epd, white=True))
+    sleep_display(epd)
+
+
+class SimulatedEPD:
+    """
+    パネルのない環境用の模擬ディスプレイ（epd4in26.EPD と同じ使い方ができる）。
+    書き換えの回数と、パネルが起きていた時間を記録する。
+    wait を渡すと、書き換えのたびに REFRESH_SECONDS 秒待つ（仮想時計を進めるなど）。
+    """
+
+    width = 800
+    height = 480
+
+    def __init__(self, clock=None, wait=None, on_event=None):
+        self.clock = clock or time.time
+        self.wait = wait
+        self.on_event = on_event
+        self.refreshes = 0
+        self.active_seconds = 0.0
+        self.frame = None
+        self.awake = False
+        self._woke_at = None
+
+    def _event(self, kind, detail=''):
+        if self.on_event:
+            self.on_event(kind, detail)
+
+    def init(self):
+        if not self.awake:
+            self.awake = True
+            self._woke_at = self.clock()
+        self._event('init')
+
+    def getbuffer(self, image):
+        return bytearray(image.convert('1').tobytes('raw'))
+
+    def display(self, buffer):
+        self.frame = bytes(buffer)
+        self.refreshes += 1
+        if not self.frame.strip(b'\x00'):
+            kind = 'black'
+        elif not self.frame.strip(b'\xff'):
+            kind = 'white'
+        else:
+            kind = 'image'
+        if self.wait:
+            self.wait(REFRESH_SECONDS)
+        self._event('refresh', kind)
+
+    def sleep(self):
+        if self.awake:
+            self.active_seconds += self.clock() - self._woke_at
+            self.awake = False
+        self._event('sleep')
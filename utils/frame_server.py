@@ -0,0 +1,134 @@
+import hashlib
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ===================================================================
+# 描画サーバーとシンクライアント
+# -------------------------------------------------------------------
+# 1台のマシンでスライドを描画し、e-Paperにそのまま送れる1bitの
+# パック済みフレームをHTTPで配信します。各フレームには内容から計算した
+# ETagが付くため、クライアントは変化したフレームだけをダウンロードします。
+#
+#   GET /frames      -> スライド一覧 [{"index", "name", "etag"}, ...]
+#                       （まだ描画できていないスライドは etag が null）
+#   GET /frames/<n>  -> n番目のスライドのパック済みフレーム
+# ===================================================================
+
+
+def frame_etag(packed):
+    """フレームの内容から決まるETag"""
+    return '"' + hashlib.sha1(packed).hexdigest() + '"'
+
+
+class FramePublisher:
+    """配信するフレームを保持する（描画スレッドとHTTPスレッドで共有）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._frames = {}  # index -> (name, etag, packed)
+        self._names = {}   # index -> name（描画前のスライドも含む）
+
+    def set_slides(self, names):
+        """配信するスライドの一覧を決める（フレームはあとから publish する）"""
+        with self._lock:
+            self._names = dict(enumerate(names))
+
+    def publish(self, index, name, packed):
+        packed = bytes(packed)
+        with self._lock:
+            self._frames[index] = (name, frame_etag(packed), packed)
+
+    def get(self, index):
+        with self._lock:
+            return self._frames.get(index)
+
+    def listing(self):
+        with self._lock:
+            listing = {index: {"index": index, "name": name, "etag": None}
+                       for index, name in self._names.items()}
+            for index, (name, etag, _) in self._frames.items():
+                listing[index] = {"index": index, "name": name, "etag": etag}
+            return [listing[index] for index in sorted(listing)]
+
+
+class FrameRequestHandler(BaseHTTPRequestHandler):
+    publisher = None  # start_frame_server() でサブクラスに設定される
+
+    def do_GET(self):
+        parts = self.path.strip('/').split('/')
+        if parts == ['frames']:
+            body = json.dumps(self.publisher.listing(), ensure_ascii=False).encode('utf-8')
+            self._send(200, body, 'application/json; charset=utf-8')
+        elif len(parts) == 2 and parts[0] == 'frames' and parts[1].isdigit():
+            frame = self.publisher.get(int(parts[1]))
+            if frame is None:
+                self._send(404, b'', 'text/plain')
+                return
+            _, etag, packed = frame
+            if self.headers.get('If-None-Match') == etag:
+                self._send(304, None, None, etag)
+            else:
+                self._send(200, packed, 'application/octet-stream', etag)
+        else:
+            self._send(404, b'', 'text/plain')
+
+    def _send(self, status, body, content_type, etag=None):
+        self.send_response(status)
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+        if body is not None:
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # アクセスログは出さない
+
+
+def start_frame_server(publisher, host='0.0.0.0', port=8080):
+    """HTTPサーバーを別スレッドで起動する。port=0なら空いているポートを使う"""
+    handler = type('BoundFrameRequestHandler', (FrameRequestHandler,), {'publisher': publisher})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+class FrameClient:
+    """描画サーバーからフレームを取得する。変化がなければ手元のフレームを使う"""
+
+    def __init__(self, base_url, timeout=10):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self._cache = {}  # index -> (etag, packed)
+        self.downloads = 0
+        self.not_modified = 0
+
+    def slides(self):
+        with urllib.request.urlopen(f"{self.base_url}/frames", timeout=self.timeout) as response:
+            return json.loads(response.read().decode('utf-8'))
+
+    def fetch(self, index):
+        """パック済みフレームを返す（サーバー側で変わっていなければ304で済ませる）"""
+        request = urllib.request.Request(f"{self.base_url}/frames/{index}")
+        cached = self._cache.get(index)
+        if cached:
+            request.add_header('If-None-Match', cached[0])
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                packed = response.read()
+                self._cache[index] = (response.headers.get('ETag'), packed)
+                self.downloads += 1
+                return packed
+        except urllib.error.HTTPError as e:
+            if e.code == 304 and cached:
+                self.not_modified += 1
+                return cached[1]
+            raise
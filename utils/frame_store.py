@@ -0,0 +1,85 @@
+import hashlib
+import json
+import os
+import time
+
+# ===================================================================
+# 最後に表示できたフレームの保存
+# -------------------------------------------------------------------
+# スライドごとに、最後に正常に表示したパック済みフレームをディスクに
+# 保存しておきます。再起動直後は、スライドのモジュールやネットワークを
+# 読み込む前にこのフレームをパネルに出すことで、すぐに画面が表示されます。
+# このモジュールは標準ライブラリだけを使います（起動を遅くしないため）。
+# ===================================================================
+
+
+class FrameStore:
+    """スライド番号ごとのフレームを directory に保存する"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._index_path = os.path.join(directory, 'index.json')
+        self._index = None
+
+    def _load_index(self):
+        if self._index is None:
+            try:
+                with open(self._index_path, 'r', encoding='utf-8') as f:
+                    self._index = json.load(f)
+            except (OSError, ValueError):
+                self._index = {"slides": {}, "latest": None}
+        return self._index
+
+    def _frame_path(self, index):
+        return os.path.join(self.directory, f"slide{index}.bin")
+
+    def save(self, index, name, packed):
+        """
+        フレームを保存する。前回と同じ内容なら何も書き込まない（SDカードの消耗を抑える）。
+        saved_at は内容が最後に変わった時刻のままにする（同じフレームの再表示では更新しない）。
+        latest も内容が変わったときだけ記録するので、ローテーションのたびには書き換えない。
+        """
+        meta = self._load_index()
+        digest = hashlib.sha1(packed).hexdigest()
+        entry = meta["slides"].get(str(index))
+        if entry and entry["sha1"] == digest and entry["name"] == name:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            _write_atomic(self._frame_path(index), bytes(packed))
+            meta["slides"][str(index)] = {"name": name, "sha1": digest, "saved_at": time.time()}
+            meta["latest"] = index
+            _write_atomic(self._index_path, json.dumps(meta, ensure_ascii=False).encode('utf-8'))
+        except OSError as e:
+            print(f"フレームの保存エラー: {e}")
+
+    def load(self, index, name=None):
+        """保存済みのフレームと、その内容になった時刻を返す。nameが違えば（スライド構成が変わった）None"""
+        entry = self._load_index()["slides"].get(str(index))
+        if not entry or (name is not None and entry["name"] != name):
+            return None
+        try:
+            with open(self._frame_path(index), 'rb') as f:
+                packed = f.read()
+        except OSError:
+            return None
+        if hashlib.sha1(packed).hexdigest() != entry["sha1"]:
+            return None  # 書き込み途中で電源が落ちた場合など
+        return packed, entry["saved_at"]
+
+    def latest(self):
+        """最後に内容が変わったフレーム (スライド番号, フレーム, 内容になった時刻)。なければNone"""
+        index = self._load_index()["latest"]
+        if index is None:
+            return None
+        frame = self.load(index)
+        if frame is None:
+            return None
+        return (index,) + frame
+
+
+def _write_atomic(path, data):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
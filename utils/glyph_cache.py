@@ -0,0 +1,91 @@
+import threading
+from PIL import Image, ImageDraw, ImageFont
+
+# ===================================================================
+# 大きな文字のグリフキャッシュ
+# -------------------------------------------------------------------
+# 天気スライドの現在気温(168px)や都市名の頭文字(108px)は、描画のたびに
+# FreeTypeでラスタライズし直すと時間がかかります。
+# そこで1文字ずつ1bitの画像として一度だけ描き、寸法と一緒に保存しておき、
+# 文字列は保存済みのグリフを貼り合わせて描画します。
+# ===================================================================
+
+# 気温の表示に使う文字（最初に作っておく）
+TEMPERATURE_CHARS = "0123456789-°"
+
+
+class Glyph:
+    """1文字分のマスク画像と寸法"""
+
+    def __init__(self, mask, bbox, advance):
+        self.mask = mask        # 1bit画像（インクのある所が1）
+        self.bbox = bbox        # 描画位置を原点としたときの外接矩形 (font.getbbox と同じ)
+        self.advance = advance  # 次の文字までの送り幅
+
+
+class GlyphCache:
+    """フォントとサイズごとに、文字のグリフを保存しておく"""
+
+    def __init__(self, font_path, size, preload=""):
+        self.font = ImageFont.truetype(font_path, size)
+        self._glyphs = {}
+        self._lock = threading.Lock()  # 2つの天気スライドが別々のスレッドで同時に描画することがある
+        self._metrics = self.font.getmetrics()
+        for char in preload:
+            self.glyph(char)
+
+    def glyph(self, char):
+        glyph = self._glyphs.get(char)
+        if glyph is not None:
+            return glyph
+        with self._lock:
+            glyph = self._glyphs.get(char)
+            if glyph is not None:
+                return glyph
+            bbox = self.font.getbbox(char)
+            width, height = max(1, bbox[2] - bbox[0]), max(1, bbox[3] - bbox[1])
+            mask = Image.new('1', (width, height), 0)
+            ImageDraw.Draw(mask).text((-bbox[0], -bbox[1]), char, font=self.font, fill=1)
+            glyph = Glyph(mask, bbox, self.font.getlength(char))
+            self._glyphs[char] = glyph
+            return glyph
+
+    def getmetrics(self):
+        """(ascent, descent)。font.getmetrics() と同じ"""
+        return self._metrics
+
+    def _layout(self, text):
+        """各文字のグリフと、描画位置からの横方向のずれ"""
+        x = 0.0
+        for char in text:
+            glyph = self.glyph(char)
+            yield glyph, round(x)
+            x += glyph.advance
+
+    def getbbox(self, text):
+        """文字列全体の外接矩形。font.getbbox() と同じ形式"""
+        boxes = [(offset + g.bbox[0], g.bbox[1], offset + g.bbox[2], g.bbox[3])
+                 for g, offset in self._layout(text)]
+        if not boxes:
+            return (0, 0, 0, 0)
+        return (min(b[0] for b in boxes), min(b[1] for b in boxes),
+                max(b[2] for b in boxes), max(b[3] for b in boxes))
+
+    def draw(self, image, xy, text, fill=0):
+        """draw.text(xy, text, font=..., fill=fill) の代わりにグリフを貼り付ける"""
+        x, y = xy
+        for glyph, offset in self._layout(text):
+            image.paste(fill, (int(x) + offset + glyph.bbox[0], int(y) + glyph.bbox[1]), glyph.mask)
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_glyph_cache(font_path, size, preload=""):
+    """(フォント, サイズ) ごとのグリフキャッシュを返す（プロセス内で使い回す）"""
+    key = (font_path, size)
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = GlyphCache(font_path, size, preload)
+        return _caches[key]
@@ -0,0 +1,350 @@
+import argparse
+import hashlib
+import json
+import os
+
+# ===================================================================
+# 学習コンテンツの保存先とトピックの選び方
+# -------------------------------------------------------------------
+# learning_content.json は読み込み時に「学年 -> 科目 -> トピック一覧」の
+# 索引にまとめ、ファイルが更新されるまで再読み込みしません。
+# その日のトピックは (日付, 学年, 科目) から決まるハッシュで選ぶため、
+# 同じ日なら何度描画しても（再起動しても）同じトピックになります。
+#
+# 大きな問題集を扱う場合は、JSONをSQLiteに取り込んで使えます。
+#   python3 -m utils.learning_store import learning_content.json learning_content.db
+# SQLite版は選ばれた1行だけを読み込むため、問題数が増えても描画の手間は一定です。
+# ===================================================================
+
+
+class JsonContentStore:
+    """learning_content.json を学年・科目ごとに索引化して保持する"""
+
+    def __init__(self, content_file):
+        self.content_file = content_file
+        self._index = {}
+        self._version = None
+
+    def version(self):
+        """ファイルの更新日時。変わっていれば索引を作り直す"""
+        try:
+            return os.stat(self.content_file).st_mtime_ns
+        except OSError:
+            return None
+
+    def _ensure_loaded(self):
+        version = self.version()
+        if version == self._version:
+            return
+        self._index = {}
+        self._version = version
+        if version is None:
+            print(f"学習コンテンツが見つかりません: {self.content_file}")
+            return
+        try:
+            with open(self.content_file, 'r', encoding='utf-8') as f:
+                content = json.load(f)
+        except Exception as e:
+            print(f"学習コンテンツの読み込みエラー: {e}")
+            return
+        for grade_key, subjects in content.items():
+            self._index[grade_key] = {subject: list(topics) for subject, topics in subjects.items()}
+
+    def has_grade(self, grade_key):
+        self._ensure_loaded()
+        return grade_key in self._index
+
+    def subjects(self, grade_key):
+        """登録順の科目一覧"""
+        self._ensure_loaded()
+        return list(self._index.get(grade_key, {}).keys())
+
+    def count(self, grade_key, subject_key):
+        self._ensure_loaded()
+        return len(self._index.get(grade_key, {}).get(subject_key, []))
+
+    def topic(self, grade_key, subject_key, index):
+        self._ensure_loaded()
+        return self._index[grade_key][subject_key][index]
+
+
+class TopicHistory:
+    """科目ごとに、どの日にどのトピックを表示したかを記録する（重複回避用）"""
+
+    def __init__(self, history_file, max_entries=60):
+        self.history_file = history_file
+        self.max_entries = max_entries
+        self._data = None
+
+    def _load(self):
+        if self._data is None:
+            try:
+                with open(self.history_file, 'r', encoding='utf-8') as f:
+                    self._data = json.load(f)
+            except (OSError, ValueError):
+                self._data = {}
+        return self._data
+
+    def picked_on(self, grade_key, subject_key, day):
+        """その日にすでに選んだトピック番号（なければNone）"""
+        for entry in self._load().get(f"{grade_key}/{subject_key}", []):
+            if entry['date'] == day.isoformat():
+                return entry['index']
+        return None
+
+    def excluded(self, grade_key, subject_key, day, count, no_repeat):
+        """直近no_repeat回に表示したトピック番号（今回は選ばない）"""
+        n = min(no_repeat, count - 1)
+        if n <= 0:
+            return []
+        return [entry['index'] for entry in self._load().get(f"{grade_key}/{subject_key}", [])[-n:]]
+
+    def choose(self, grade_key, subject_key, day, count, no_repeat):
+        """直近に表示したトピックを除いて、その日のトピック番号を選ぶ"""
+        exclude = self.excluded(grade_key, subject_key, day, count, no_repeat)
+        return choose_topic_index(day, grade_key, subject_key, count, exclude=exclude)
+
+    def record(self, grade_key, subject_key, day, index):
+        entries = self._load().setdefault(f"{grade_key}/{subject_key}", [])
+        entries.append({'date': day.isoformat(), 'index': index})
+        del entries[:-self.max_entries]
+        try:
+            tmp_path = self.history_file + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.history_file)
+        except OSError as e:
+            print(f"学習履歴の保存エラー: {e}")
+
+
+SQLITE_EXTENSIONS = ('.db', '.sqlite', '.sqlite3')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS subjects (
+    grade TEXT NOT NULL, subject TEXT NOT NULL, sort_order INTEGER NOT NULL,
+    PRIMARY KEY (grade, subject)
+);
+CREATE TABLE IF NOT EXISTS topics (
+    id INTEGER PRIMARY KEY,
+    grade TEXT NOT NULL, subject TEXT NOT NULL, position INTEGER NOT NULL,
+    title TEXT NOT NULL, body TEXT NOT NULL,
+    UNIQUE (grade, subject, position)
+);
+CREATE TABLE IF NOT EXISTS views (
+    topic_id INTEGER NOT NULL REFERENCES topics(id) ON DELETE CASCADE,
+    viewed_on TEXT NOT NULL,
+    PRIMARY KEY (topic_id, viewed_on)
+);
+CREATE INDEX IF NOT EXISTS views_by_day ON views (viewed_on);
+-- views の要約: トピックごとの表示回数と、最後に表示した日 (date.toordinal())
+CREATE TABLE IF NOT EXISTS reviews (
+    topic_id INTEGER PRIMARY KEY REFERENCES topics(id) ON DELETE CASCADE,
+    views INTEGER NOT NULL, last_day INTEGER NOT NULL
+);
+"""
+
+
+# 表示履歴の要約を作る（要約の表がなかった古いデータベース用）
+_BACKFILL_REVIEWS = """
+INSERT OR IGNORE INTO reviews (topic_id, views, last_day)
+SELECT topic_id, COUNT(*), CAST(julianday(MAX(viewed_on)) - 1721424.5 AS INTEGER)
+FROM views GROUP BY topic_id
+"""
+
+# 次に表示してよい日（表示回数が増えるほど間隔を倍にする。? は基本の間隔）
+_DUE_DAY = 'r.last_day + (? << MIN(r.views - 1, 16))'
+
+# 指定日に表示してよいトピック（パラメータ: 学年, 科目, 基本の間隔, 日付の序数）
+_DUE_TOPICS = (
+    'FROM topics t LEFT JOIN reviews r ON r.topic_id = t.id '
+    f'WHERE t.grade = ? AND t.subject = ? AND (r.topic_id IS NULL OR {_DUE_DAY} <= ?)')
+
+
+class SqliteContentStore:
+    """
+    SQLiteに取り込んだ学習コンテンツ。必要な行だけを問い合わせる。
+    トピックごとの表示履歴も持ち、間隔反復（表示回数が増えるほど次に出るまでの
+    間隔を倍にする）でトピックを巡回させる。
+    """
+
+    def __init__(self, db_path):
+        self.content_file = db_path
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            import sqlite3  # JSON版だけを使う場合は読み込まない
+            # 学習スライドの描画は専用のワーカースレッドで1つずつ行われるので、スレッド間で共有してよい
+            self._conn = sqlite3.connect(self.content_file, check_same_thread=False)
+            self._conn.execute('PRAGMA foreign_keys = ON')
+            self._conn.executescript(_SCHEMA)
+            with self._conn:
+                self._conn.execute(_BACKFILL_REVIEWS)
+        return self._conn
+
+    def version(self):
+        """取り込みのたびに増える番号。表示履歴の書き込みでは変わらない"""
+        if not os.path.exists(self.content_file):
+            return None
+        row = self._connection().execute(
+            "SELECT value FROM meta WHERE key = 'content_version'").fetchone()
+        return row[0] if row else None
+
+    def has_grade(self, grade_key):
+        if not os.path.exists(self.content_file):
+            return False
+        row = self._connection().execute(
+            'SELECT 1 FROM subjects WHERE grade = ? LIMIT 1', (grade_key,)).fetchone()
+        return row is not None
+
+    def subjects(self, grade_key):
+        rows = self._connection().execute(
+            'SELECT subject FROM subjects WHERE grade = ? ORDER BY sort_order', (grade_key,))
+        return [subject for subject, in rows]
+
+    def count(self, grade_key, subject_key):
+        row = self._connection().execute(
+            'SELECT COUNT(*) FROM topics WHERE grade = ? AND subject = ?',
+            (grade_key, subject_key)).fetchone()
+        return row[0]
+
+    def topic(self, grade_key, subject_key, index):
+        row = self._connection().execute(
+            'SELECT title, body FROM topics WHERE grade = ? AND subject = ? AND position = ?',
+            (grade_key, subject_key, index)).fetchone()
+        if row is None:
+            raise IndexError(f"{grade_key}/{subject_key} にトピック{index}がありません")
+        return {"title": row[0], "body": row[1]}
+
+    # --- 表示履歴（TopicHistoryと同じ呼び出し方） ---
+
+    def picked_on(self, grade_key, subject_key, day):
+        row = self._connection().execute(
+            'SELECT t.position FROM views v JOIN topics t ON t.id = v.topic_id '
+            'WHERE t.grade = ? AND t.subject = ? AND v.viewed_on = ?',
+            (grade_key, subject_key, day.isoformat())).fetchone()
+        return row[0] if row else None
+
+    def choose(self, grade_key, subject_key, day, count, no_repeat):
+        """
+        復習の時期が来ているトピックから、その日のトピック番号を選ぶ。
+        選ぶ処理はSQLの中で行い、読み込むのは選ばれた1行だけにする。
+        どれもまだ時期が来ていなければ、時期が最も近い（最も前に表示した）トピックを選ぶ。
+        """
+        conn = self._connection()
+        params = (grade_key, subject_key, max(1, no_repeat), day.toordinal())
+        due_count = conn.execute('SELECT COUNT(*) ' + _DUE_TOPICS, params).fetchone()[0]
+        if due_count:
+            offset = int.from_bytes(_topic_seed(day, grade_key, subject_key), 'big') % due_count
+            row = conn.execute(
+                'SELECT t.position ' + _DUE_TOPICS + ' ORDER BY t.position LIMIT 1 OFFSET ?',
+                params + (offset,)).fetchone()
+        else:
+            row = conn.execute(
+                'SELECT t.position FROM topics t JOIN reviews r ON r.topic_id = t.id '
+                f'WHERE t.grade = ? AND t.subject = ? ORDER BY {_DUE_DAY}, r.last_day, t.position LIMIT 1',
+                params[:3]).fetchone()
+        return row[0]
+
+    def record(self, grade_key, subject_key, day, index):
+        conn = self._connection()
+        topic = (grade_key, subject_key, index)
+        with conn:
+            inserted = conn.execute(
+                'INSERT OR IGNORE INTO views (topic_id, viewed_on) '
+                'SELECT id, ? FROM topics WHERE grade = ? AND subject = ? AND position = ?',
+                (day.isoformat(),) + topic).rowcount
+            if inserted:
+                conn.execute(
+                    'INSERT INTO reviews (topic_id, views, last_day) '
+                    'SELECT id, 1, ? FROM topics WHERE grade = ? AND subject = ? AND position = ? '
+                    'ON CONFLICT (topic_id) DO UPDATE SET '
+                    'views = views + 1, last_day = MAX(last_day, excluded.last_day)',
+                    (day.toordinal(),) + topic)
+
+
+def import_json_to_sqlite(json_path, db_path):
+    """learning_content.json の内容をSQLiteに取り込む（同じ位置のトピックは上書き）"""
+    with open(json_path, 'r', encoding='utf-8') as f:
+        content = json.load(f)
+
+    import sqlite3
+    conn = sqlite3.connect(db_path)
+    conn.execute('PRAGMA foreign_keys = ON')
+    conn.executescript(_SCHEMA)
+    total = 0
+    with conn:
+        for grade_key, subjects in content.items():
+            conn.execute('DELETE FROM subjects WHERE grade = ?', (grade_key,))
+            for order, (subject_key, topics) in enumerate(subjects.items()):
+                conn.execute('INSERT INTO subjects (grade, subject, sort_order) VALUES (?, ?, ?)',
+                             (grade_key, subject_key, order))
+                for position, topic in enumerate(topics):
+                    conn.execute(
+                        'INSERT INTO topics (grade, subject, position, title, body) '
+                        'VALUES (?, ?, ?, ?, ?) '
+                        'ON CONFLICT (grade, subject, position) '
+                        'DO UPDATE SET title = excluded.title, body = excluded.body',
+                        (grade_key, subject_key, position, topic.get("title", ""), topic.get("body", "")))
+                # 減ったトピックは削除する（表示履歴も一緒に消える）
+                conn.execute('DELETE FROM topics WHERE grade = ? AND subject = ? AND position >= ?',
+                             (grade_key, subject_key, len(topics)))
+                total += len(topics)
+            conn.execute('DELETE FROM topics WHERE grade = ? AND subject NOT IN '
+                         '(SELECT subject FROM subjects WHERE grade = ?)', (grade_key, grade_key))
+        conn.execute("INSERT INTO meta (key, value) VALUES ('content_version', '1') "
+                     "ON CONFLICT (key) DO UPDATE SET value = CAST(value AS INTEGER) + 1")
+    conn.close()
+    return total
+
+
+def open_content_store(content_file):
+    """ファイルの拡張子に応じて、JSON版かSQLite版のストアを返す"""
+    if content_file.lower().endswith(SQLITE_EXTENSIONS):
+        return SqliteContentStore(content_file)
+    return JsonContentStore(content_file)
+
+
+def _topic_seed(day, grade_key, subject_key, *extra):
+    seed = ":".join([day.isoformat(), grade_key, subject_key, *map(str, extra)]).encode('utf-8')
+    return hashlib.sha256(seed).digest()
+
+
+def choose_topic_index(day, grade_key, subject_key, count, exclude=()):
+    """(日付, 学年, 科目) から決まる順位で、除外されていないトピックを一つ選ぶ"""
+    exclude = set(exclude)
+    candidates = [i for i in range(count) if i not in exclude] or list(range(count))
+    return min(candidates, key=lambda i: _topic_seed(day, grade_key, subject_key, i))
+
+
+def pick_daily_topic(store, day, grade_key, subject_key, history=None, no_repeat=0):
+    """
+    その日のトピック番号を決める。
+    historyを渡すと、最近表示したトピックを避け、選んだ結果を記録する。
+    """
+    count = store.count(grade_key, subject_key)
+    if count == 0:
+        return None
+    if history is None:
+        return choose_topic_index(day, grade_key, subject_key, count)
+
+    index = history.picked_on(grade_key, subject_key, day)
+    if index is not None and index < count:
+        return index
+    index = history.choose(grade_key, subject_key, day, count, no_repeat)
+    history.record(grade_key, subject_key, day, index)
+    return index
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="学習コンテンツの管理")
+    commands = parser.add_subparsers(dest='command', required=True)
+    import_parser = commands.add_parser('import', help="JSONの学習コンテンツをSQLiteに取り込む")
+    import_parser.add_argument('json_path')
+    import_parser.add_argument('db_path')
+    args = parser.parse_args()
+
+    if args.command == 'import':
+        count = import_json_to_sqlite(args.json_path, args.db_path)
+        print(f"{count}件のトピックを {args.db_path} に取り込みました")
@@ -0,0 +1,189 @@
+import collections
+import heapq
+import itertools
+import os
+import selectors
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# ===================================================================
+# イベントループ
+# -------------------------------------------------------------------
+# time.sleep() で待つ代わりに、タイマー・ファイル監視・シグナル・
+# バックグラウンド処理の完了をひとつのループで待ち受けます。
+# 仕組みは asyncio と同じ「selector + 自己パイプ」方式です。
+# ===================================================================
+
+
+class TimerHandle:
+    """call_later() が返すハンドル。cancel() で予約を取り消せる"""
+
+    def __init__(self, when, callback, args):
+        self.when = when
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class EventLoop:
+    """スライド表示用のシンプルなイベントループ"""
+
+    def __init__(self, clock=time.monotonic, max_workers=1):
+        self.clock = clock
+        self._timers = []
+        self._seq = itertools.count()
+        self._ready = collections.deque()
+        self._running = False
+        self._max_workers = max_workers
+        self._executor = None
+        self._workers = {}  # 名前 -> 専用のワーカースレッド
+        self._selector = selectors.DefaultSelector()
+
+        # 別スレッドやシグナルハンドラからループを起こすためのパイプ
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ, (self._drain_wakeup, ()))
+
+    # --- 予約系 ---
+
+    def time(self):
+        """ループが使っている現在時刻（秒）"""
+        return self.clock()
+
+    def call_soon(self, callback, *args):
+        """次のループ周回でcallbackを実行する"""
+        self._ready.append((callback, args))
+
+    def call_soon_threadsafe(self, callback, *args):
+        """別スレッドからcallbackの実行を依頼する"""
+        self._ready.append((callback, args))
+        self._wakeup()
+
+    def call_at(self, when, callback, *args):
+        """指定時刻にcallbackを実行する"""
+        handle = TimerHandle(when, callback, args)
+        heapq.heappush(self._timers, (when, next(self._seq), handle))
+        return handle
+
+    def call_later(self, delay, callback, *args):
+        """delay秒後にcallbackを実行する"""
+        return self.call_at(self.time() + delay, callback, *args)
+
+    def run_in_background(self, func, *args, on_done=None, worker=None):
+        """
+        funcをワーカースレッドで実行し、完了したらon_done(future)をループ上で呼ぶ。
+        workerに名前を渡すと、その名前専用のスレッドで実行する
+        （ほかの処理が止まっていても、その後ろに並ばされない）。
+        """
+        future = self._get_executor(worker).submit(func, *args)
+        if on_done:
+            future.add_done_callback(lambda f: self.call_soon_threadsafe(on_done, f))
+        return future
+
+    def _get_executor(self, worker):
+        if worker is not None:
+            if worker not in self._workers:
+                self._workers[worker] = ThreadPoolExecutor(max_workers=1)
+            return self._workers[worker]
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._max_workers)
+        return self._executor
+
+    def add_reader(self, fd, callback, *args):
+        """fdが読み込み可能になったらcallbackを呼ぶ"""
+        self._selector.register(fd, selectors.EVENT_READ, (callback, args))
+
+    def remove_reader(self, fd):
+        try:
+            self._selector.unregister(fd)
+        except (KeyError, ValueError):
+            pass
+
+    def add_signal_handler(self, signum, callback, *args):
+        """シグナル受信時にcallbackをループ上で実行する"""
+        def handler(_signum, _frame):
+            # シグナルハンドラ内ではロックを取らない（deque.appendはアトミック）
+            self._ready.append((callback, args))
+        signal.signal(signum, handler)
+        signal.set_wakeup_fd(self._wake_w)
+
+    # --- 実行 ---
+
+    def stop(self):
+        """現在の周回が終わったらrun_forever()から抜ける"""
+        self._running = False
+
+    def run_forever(self):
+        """stop()が呼ばれるまでイベントを処理し続ける"""
+        self._running = True
+        while self._running:
+            self._run_once()
+
+    def close(self):
+        for executor in [self._executor, *self._workers.values()]:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        self._workers = {}
+        try:
+            signal.set_wakeup_fd(-1)
+        except ValueError:
+            pass  # メインスレッド以外から閉じた場合
+        self._selector.close()
+        os.close(self._wake_r)
+        os.close(self._wake_w)
+
+    def _run_once(self):
+        # 取り消し済みのタイマーを先頭から捨てる
+        while self._timers and self._timers[0][2].cancelled:
+            heapq.heappop(self._timers)
+
+        if self._ready:
+            timeout = 0
+        elif self._timers:
+            timeout = max(0, self._timers[0][0] - self.time())
+        else:
+            timeout = None
+        self._wait(timeout)
+
+        # 期限が来たタイマーを実行待ちに移す
+        now = self.time()
+        while self._timers and self._timers[0][0] <= now:
+            _, _, handle = heapq.heappop(self._timers)
+            if not handle.cancelled:
+                self._ready.append((handle.callback, handle.args))
+
+        # この周回の時点で溜まっている分だけ実行する
+        for _ in range(len(self._ready)):
+            callback, args = self._ready.popleft()
+            try:
+                callback(*args)
+            except Exception as e:
+                # ひとつの処理が失敗しても、ループ（パネルの表示）は止めない
+                print(f"イベント処理でエラーが発生しました ({getattr(callback, '__qualname__', callback)}): {e}")
+            if not self._running:
+                break
+
+    def _wait(self, timeout):
+        """イベントが来るかtimeout秒経つまで待つ"""
+        for key, _ in self._selector.select(timeout):
+            callback, args = key.data
+            self._ready.append((callback, args))
+
+    def _wakeup(self):
+        try:
+            os.write(self._wake_w, b'\0')
+        except (BlockingIOError, OSError):
+            pass  # パイプが詰まっていても、既に起こされているので問題ない
+
+    def _drain_wakeup(self):
+        try:
+            while os.read(self._wake_r, 4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
@@ -0,0 +1,144 @@
+import datetime
+import os
+import time
+
+# ===================================================================
+# データ変化に応じたスライドのスケジューリング
+# -------------------------------------------------------------------
+# 各スライドは「何が変わったら描き直す必要があるか」を宣言します。
+#   - ttl   : データの有効期間（秒）。天気予報など。関数を渡すと毎回その値を使う
+#   - daily : 日付が変わったら描き直す。カレンダーや今日の学習など
+#   - files : これらのファイルの更新日時が変わったら描き直す
+#   - versions : {ファイル: 関数}。更新日時の代わりに関数の返す値（内容のバージョン）で
+#                判定する。表示履歴の書き込みなど、内容以外の理由で更新されるファイル用
+#   - deadline : 描画にかけてよい時間（秒）。超えたら古いフレームで代用する
+# 入力が変わっていなければ、前回描画した画像（フレーム）をそのまま使います。
+# ===================================================================
+
+
+class SlideSpec:
+    """スライド1枚分の定義（名前・生成関数・依存するデータ）"""
+
+    def __init__(self, name, factory, ttl=None, daily=False, files=(), deadline=None, versions=None):
+        self.name = name
+        self.factory = factory
+        self.ttl = ttl
+        self.daily = daily
+        self.files = [os.path.abspath(f) for f in files]
+        self.deadline = deadline
+        self.versions = {os.path.abspath(f): version for f, version in (versions or {}).items()}
+
+    def signature(self, now):
+        """このスライドの入力を表す値。前回と同じなら描き直す必要はない"""
+        date = datetime.date.fromtimestamp(now) if self.daily else None
+        return date, tuple(self.versions[f]() if f in self.versions else _mtime(f) for f in self.files)
+
+    def depends_on(self, path):
+        return os.path.abspath(path) in self.files
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class _Entry:
+    def __init__(self, frame, signature, rendered_at, generation):
+        self.frame = frame
+        self.signature = signature
+        self.rendered_at = rendered_at
+        self.generation = generation
+
+
+class SlideScheduler:
+    """スライドごとに描画済みフレームを保持し、描き直しが必要かを判定する"""
+
+    def __init__(self, specs, clock=None, static_dwell_factor=1.0):
+        self.specs = specs
+        self.clock = clock or time.time
+        self.static_dwell_factor = static_dwell_factor
+        self._entries = {}     # スライド番号 -> _Entry
+        self._displayed = {}   # スライド番号 -> 最後に表示したフレームの世代番号
+        self.renders = 0
+        self.cache_hits = 0
+
+    def signature(self, index):
+        return self.specs[index].signature(self.clock())
+
+    def is_fresh(self, index):
+        """キャッシュ済みのフレームがそのまま使えるならTrue"""
+        entry = self._entries.get(index)
+        if entry is None:
+            return False
+        spec = self.specs[index]
+        now = self.clock()
+        ttl = spec.ttl() if callable(spec.ttl) else spec.ttl
+        if ttl is not None and now - entry.rendered_at >= ttl:
+            return False
+        return entry.signature == spec.signature(now)
+
+    def cached(self, index):
+        """使えるフレームがあれば返す（なければNone）"""
+        if self.is_fresh(index):
+            self.cache_hits += 1
+            return self._entries[index].frame
+        return None
+
+    def last_good(self, index):
+        """古くなっていても構わないので、最後に描画できたフレームと描画時刻を返す"""
+        entry = self._entries.get(index)
+        if entry is None:
+            return None
+        return entry.frame, entry.rendered_at
+
+    def store(self, index, frame, signature):
+        """描画結果を保存する。signatureは描画を始める前に取得した値を渡す"""
+        self.renders += 1
+        self._entries[index] = _Entry(frame, signature, self.clock(), self.renders)
+
+    def invalidate(self, index):
+        """次回は必ず描き直す（古いフレームは代用のために残しておく）"""
+        entry = self._entries.get(index)
+        if entry is not None:
+            entry.signature = None
+
+    def affected_by(self, path):
+        """
+        指定ファイルに依存しているスライド番号の一覧。
+        versions で判定するファイルは、バージョンが変わったスライドだけを返す。
+        """
+        path = os.path.abspath(path)
+        now = self.clock()
+        affected = []
+        for i, spec in enumerate(self.specs):
+            if not spec.depends_on(path):
+                continue
+            entry = self._entries.get(i)
+            if path in spec.versions and entry and entry.signature == spec.signature(now):
+                continue
+            affected.append(i)
+        return affected
+
+    # --- 表示の記録と表示時間 ---
+
+    def mark_displayed(self, index):
+        """表示したことを記録し、前回の表示から内容が変わっていればTrueを返す"""
+        entry = self._entries.get(index)
+        generation = entry.generation if entry else None
+        changed = self._displayed.get(index) != generation
+        self._displayed[index] = generation
+        return changed
+
+    def is_unchanged(self, index):
+        """前回表示したときから入力が変わっていないスライドならTrue"""
+        entry = self._entries.get(index)
+        return (entry is not None and self.is_fresh(index)
+                and self._displayed.get(index) == entry.generation)
+
+    def dwell(self, base, changed):
+        """表示時間を決める。静的な画面では長めに表示して書き換え回数を減らす"""
+        if changed:
+            return base
+        return base * self.static_dwell_factor
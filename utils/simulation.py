@@ -0,0 +1,313 @@
+import collections
+import contextlib
+import copy
+import csv
+import datetime
+import json
+import math
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import time
+from concurrent.futures import Future
+
+from utils import weather_api
+from utils.epaper import SimulatedEPD
+from utils.runtime import EventLoop
+
+# ===================================================================
+# 仮想時間でのシミュレーション
+# -------------------------------------------------------------------
+# 本物の main の処理（スライドショー・キャッシュ・日付の変わり目など）を、
+# 仮想時計・模擬ディスプレイ・天気APIの代わりのフィクスチャで動かします。
+# 待ち時間は実際には待たずに時計を進めるだけなので、1週間分の動作が
+# 数秒で終わります。書き換え・API呼び出し・キャッシュの利用などを
+# タイムライン(CSV)に記録し、日ごとの集計を表示します。
+#
+# 状態ファイル（api_budget.json, last_frames など）を汚さないよう、
+# 一時ディレクトリに設定ファイルなどをコピーして、その中で動かします。
+#
+# 時刻を使うクラス（SlideScheduler, RequestBudget, CadenceController など）は
+# clock=None のとき、作成した時点の time.time を覚えて使います。
+# virtual_time() の中で作られたものは仮想時計を、そうでなければ本物の時計を
+# 使い続けるので、シミュレーション用に clock を渡して回る必要はありません。
+# ===================================================================
+
+DAY = 24 * 60 * 60
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURE_DIR = os.path.join(PROJECT_DIR, 'fixtures', 'weather')
+INPUT_EXTENSIONS = ('.json', '.db', '.sqlite', '.sqlite3')  # 一時ディレクトリにコピーする入力ファイル
+STATE_NAMES = ('api_budget.json', 'last_frames')             # コピーしない状態ファイル
+DIURNAL_SWING = 4.0  # フィクスチャの気温に加える1日の気温差の半分（℃）
+
+
+class VirtualClock:
+    """advance() したときだけ進む時計（UNIX時刻）"""
+
+    def __init__(self, start):
+        self.now = start
+
+    def time(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += max(0, seconds)
+
+
+class VirtualEventLoop(EventLoop):
+    """タイマーを実際には待たず、仮想時計を次の予定時刻まで進めるイベントループ"""
+
+    def __init__(self, clock, until):
+        super().__init__(clock=clock.time)
+        self.virtual_clock = clock
+        self.until = until
+        self._signal_callbacks = {}
+        self._finishing = False
+
+    def add_signal_handler(self, signum, callback, *args):
+        # 本物のシグナルは受けず、シミュレーションの終了時にSIGTERMの処理を呼ぶ
+        self._signal_callbacks[signum] = (callback, args)
+
+    def run_in_background(self, func, *args, on_done=None, worker=None):
+        # 描画は仮想時間の上では一瞬で終わるものとして、その場で実行する
+        future = Future()
+        try:
+            future.set_result(func(*args))
+        except Exception as e:
+            future.set_exception(e)
+        if on_done:
+            self.call_soon(on_done, future)
+        return future
+
+    def _wait(self, timeout):
+        super()._wait(0)  # ファイル監視などの実際のイベントだけは拾う
+        if self._ready or timeout == 0:
+            return
+        if timeout is None or self.time() + timeout >= self.until:
+            self.virtual_clock.now = max(self.time(), self.until)
+            self._finish()
+            return
+        self.virtual_clock.advance(timeout)
+
+    def _finish(self):
+        """終了時刻になったら、SIGTERMを受けたときと同じ終了処理を行う"""
+        if self._finishing:
+            self.stop()
+            return
+        self._finishing = True
+        callback, args = self._signal_callbacks.get(signal.SIGTERM, (self.stop, ()))
+        self.call_soon(callback, *args)
+
+
+@contextlib.contextmanager
+def virtual_time(clock):
+    """time.time() と datetime の now()/today() が仮想時計を返すようにする"""
+    real_time = time.time
+    real_datetime, real_date = datetime.datetime, datetime.date
+
+    class VirtualDatetime(real_datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return real_datetime.fromtimestamp(clock.time(), tz)
+
+        @classmethod
+        def today(cls):
+            return real_datetime.fromtimestamp(clock.time())
+
+    class VirtualDate(real_date):
+        @classmethod
+        def today(cls):
+            return real_date.fromtimestamp(clock.time())
+
+    replacements = {real_datetime: VirtualDatetime, real_date: VirtualDate}
+
+    def swap(mapping):
+        # このプロジェクトのモジュールで「from datetime import datetime」済みのものも差し替える
+        for module in list(sys.modules.values()):
+            path = getattr(module, '__file__', None) or ''
+            if not os.path.abspath(path).startswith(PROJECT_DIR + os.sep):
+                continue
+            namespace = module.__dict__
+            for name, value in list(namespace.items()):
+                if isinstance(value, type) and value in mapping:
+                    namespace[name] = mapping[value]
+
+    time.time = clock.time
+    datetime.datetime, datetime.date = VirtualDatetime, VirtualDate
+    swap(replacements)
+    try:
+        yield
+    finally:
+        time.time = real_time
+        datetime.datetime, datetime.date = real_datetime, real_date
+        swap({virtual: real for real, virtual in replacements.items()})
+
+
+class FixtureResponse:
+    """requests.Response の代わり（raise_for_status と json だけ）"""
+
+    def __init__(self, data):
+        self._data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._data
+
+
+class FixtureTransport:
+    """
+    天気APIの代わりに fixtures/weather/<エンドポイント>.json を返す。
+    時刻は仮想時計の現在時刻に合わせてずらし、気温には1日の変化を加える。
+    """
+
+    def __init__(self, directory, clock, on_call=None):
+        self.clock = clock
+        self.on_call = on_call
+        self.fixtures = {}
+        for endpoint in weather_api.ENDPOINTS:
+            with open(os.path.join(directory, f"{endpoint}.json"), 'r', encoding='utf-8') as f:
+                self.fixtures[endpoint] = json.load(f)
+        self._base = self.fixtures['weather']['dt']
+
+    def __call__(self, url, params=None, timeout=None):
+        endpoint = url.rsplit('/', 1)[-1]
+        if self.on_call:
+            self.on_call('api', endpoint)
+        offset = int(self.clock.time()) // 3600 * 3600 - self._base
+        data = copy.deepcopy(self.fixtures[endpoint])
+        self._rebase(data, offset)
+        return FixtureResponse(data)
+
+    def _rebase(self, data, offset):
+        if isinstance(data, list):
+            for item in data:
+                self._rebase(item, offset)
+            return
+        if not isinstance(data, dict):
+            return
+        for key in ('dt', 'sunrise', 'sunset'):
+            if key in data:
+                data[key] += offset
+        if 'dt' in data and 'main' in data:
+            hour = time.localtime(data['dt']).tm_hour
+            # 明け方に最も低く、昼過ぎに最も高くなるようにする
+            swing = -DIURNAL_SWING * math.cos(2 * math.pi * (hour - 3) / 24)
+            for key in ('temp', 'feels_like'):
+                if key in data['main']:
+                    data['main'][key] = round(data['main'][key] + swing, 1)
+            for weather in data.get('weather', []):
+                weather['icon'] = weather['icon'][:2] + ('d' if 6 <= hour < 18 else 'n')
+        for value in data.values():
+            self._rebase(value, offset)
+
+
+@contextlib.contextmanager
+def isolated_workdir():
+    """入力ファイルだけを持つ一時ディレクトリに移動する（状態ファイルを汚さないため）"""
+    original = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix='epaper-simulation-')
+    for name in os.listdir(original):
+        source = os.path.join(original, name)
+        if name in STATE_NAMES or name.startswith('weather_history_'):
+            continue
+        if os.path.isfile(source) and name.endswith(INPUT_EXTENSIONS):
+            shutil.copy2(source, workdir)
+        elif os.path.isdir(source) and not name.startswith('.'):
+            os.symlink(source, os.path.join(workdir, name))  # 写真フォルダなど（読むだけ）
+    os.chdir(workdir)
+    try:
+        yield workdir
+    finally:
+        os.chdir(original)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+class Simulation:
+    """days日分の動作を仮想時間で再現し、タイムラインと日ごとの集計を出力する"""
+
+    def __init__(self, days, output_dir='simulation', fixture_dir=FIXTURE_DIR, start=None):
+        self.days = days
+        self.output_dir = os.path.abspath(output_dir)
+        self.fixture_dir = os.path.abspath(fixture_dir)
+        self.start = start
+        self.timeline = []  # (仮想時刻, 種類, 詳細)
+
+    def run(self, panel):
+        """panel(loop, open_display, on_event) を仮想時間で動かす（main.run_panel）"""
+        clock = VirtualClock(self.start or time.time())
+        start = clock.time()
+        loop = VirtualEventLoop(clock, start + self.days * DAY)
+
+        def record(kind, detail=''):
+            self.timeline.append((clock.time(), kind, detail))
+
+        epd = SimulatedEPD(clock=clock.time, wait=clock.advance, on_event=record)
+
+        def open_display():
+            epd.init()
+            return epd
+
+        transport = FixtureTransport(self.fixture_dir, clock, on_call=record)
+        os.makedirs(self.output_dir, exist_ok=True)
+        wall_start = time.perf_counter()
+        # スライドのモジュールは仮想時間にしてから読み込まれる
+        with open(os.path.join(self.output_dir, 'log.txt'), 'w', encoding='utf-8') as log, \
+                contextlib.redirect_stdout(log), isolated_workdir(), virtual_time(clock):
+            weather_api.set_transport(transport)
+            try:
+                panel(loop, open_display, record)
+            finally:
+                weather_api.set_transport(None)
+        elapsed = time.perf_counter() - wall_start
+
+        self.write_timeline(os.path.join(self.output_dir, 'timeline.csv'))
+        self.report(start, clock.time(), elapsed)
+
+    def write_timeline(self, path):
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['time', 'event', 'detail'])
+            for when, kind, detail in self.timeline:
+                writer.writerow([time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(when)), kind, detail])
+
+    def daily_summary(self):
+        """日付ごとに、書き換え回数・API呼び出し・キャッシュの利用・パネルの稼働時間を集計する"""
+        days = collections.OrderedDict()
+        woke_at = None
+        for when, kind, detail in self.timeline:
+            day = days.setdefault(time.strftime('%Y-%m-%d', time.localtime(when)),
+                                  collections.Counter())
+            if kind == 'refresh':
+                day['refreshes'] += 1
+                if detail != 'image':
+                    day['blank_refreshes'] += 1
+            elif kind == 'init':
+                woke_at = when if woke_at is None else woke_at
+            elif kind == 'sleep' and woke_at is not None:
+                day['active_seconds'] += when - woke_at
+                woke_at = None
+            else:
+                day[kind] += 1
+        return days
+
+    def report(self, start, end, elapsed):
+        print(f"シミュレーション: {time.strftime('%m/%d %H:%M', time.localtime(start))} 〜 "
+              f"{time.strftime('%m/%d %H:%M', time.localtime(end))} を {elapsed:.1f}秒で実行しました")
+        print(f"{'日付':<10} {'書き換え':>6} {'(黒/白)':>6} {'表示':>4} {'描画':>4} {'キャッシュ':>5} "
+              f"{'古い画面':>4} {'API':>4} {'パネル稼働':>6}")
+        total = collections.Counter()
+        for date, day in self.daily_summary().items():
+            total.update(day)
+            self._print_row(date, day)
+        self._print_row('合計', total)
+        print(f"タイムライン: {os.path.join(self.output_dir, 'timeline.csv')}")
+
+    @staticmethod
+    def _print_row(label, day):
+        print(f"{label:<10} {day['refreshes']:>8} {day['blank_refreshes']:>8} {day['slide']:>6} "
+              f"{day['render']:>6} {day['cache_hit']:>9} {day['stale']:>8} {day['api']:>5} "
+              f"{day['active_seconds'] / 60:>9.1f}分")
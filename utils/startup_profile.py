@@ -0,0 +1,168 @@
+import contextlib
+import sys
+import threading
+import time
+
+# ===================================================================
+# 起動時間の計測 (python3 main.py --profile-startup)
+# -------------------------------------------------------------------
+# python -X importtime と同じように、モジュールごとの読み込み時間を測ります。
+# 読み込みは「起動処理」と「スライドのモジュールごとの初回描画」に分けて集計し、
+# 起動から最初のフレームを表示するまでの時間 (time-to-first-frame) も表示します。
+# 計測を始める前に読み込まれたモジュール（Python本体の起動分）は含みません。
+# ===================================================================
+
+MAIN_PHASE = '起動処理'
+TOP_IMPORTS = 4  # 重いモジュールを何個まで表示するか
+
+_profile = None
+
+
+class _Import:
+    def __init__(self, name):
+        self.name = name
+        self.elapsed = 0.0
+        self.children = []
+
+    def self_time(self):
+        return self.elapsed - sum(child.elapsed for child in self.children)
+
+
+class StartupProfile:
+    """sys.meta_path に入り、モジュールの読み込み（実行）にかかった時間を記録する"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.marks = []        # (経過秒, 出来事)
+        self.imports = {}      # 区分 -> 直接読み込まれたモジュールの一覧
+        self.phases = {}       # 区分 -> 所要秒
+        self.reported = False
+        self._local = threading.local()
+
+    def install(self):
+        sys.meta_path.insert(0, self)
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    # --- 読み込みの計測 ---
+
+    def find_spec(self, name, path, target=None):
+        # 自分以外のファインダーで探し、見つかったローダーの exec_module を計測用に包む
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        loader = spec.loader
+        if loader is not None and not isinstance(loader, type) and hasattr(loader, 'exec_module'):
+            self._wrap(loader, name)
+        return spec
+
+    def _wrap(self, loader, name):
+        exec_module = loader.exec_module
+
+        def timed_exec_module(module):
+            del loader.exec_module  # 包むのは1回だけ（ローダーのメソッドに戻す）
+            self._run(name, exec_module, module)
+
+        try:
+            loader.exec_module = timed_exec_module
+        except AttributeError:
+            pass  # 属性を追加できないローダーは計測しない
+
+    def _state(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+            self._local.phase = MAIN_PHASE
+        return self._local
+
+    def _run(self, name, exec_module, module):
+        state = self._state()
+        node = _Import(name)
+        if state.stack:
+            state.stack[-1].children.append(node)
+        else:
+            self.imports.setdefault(state.phase, []).append(node)
+        state.stack.append(node)
+        start = time.perf_counter()
+        try:
+            exec_module(module)
+        finally:
+            node.elapsed = time.perf_counter() - start
+            state.stack.pop()
+
+    # --- 区分と出来事 ---
+
+    @contextlib.contextmanager
+    def phase(self, label):
+        """この中で読み込まれたモジュールを label の分として数える（初回のみ）"""
+        state = self._state()
+        if label in self.phases or state.phase != MAIN_PHASE:
+            yield
+            return
+        state.phase = label
+        self.phases[label] = None
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            state.phase = MAIN_PHASE
+            self.phases[label] = time.perf_counter() - start
+            if self.reported:
+                print(self._phase_line(label))
+
+    def mark(self, event):
+        self.marks.append((time.perf_counter() - self.started, event))
+
+    # --- 表示 ---
+
+    def _phase_line(self, label):
+        imports = self.imports.get(label, [])
+        total = sum(node.elapsed for node in imports)
+        heaviest = sorted(imports, key=lambda node: node.elapsed, reverse=True)[:TOP_IMPORTS]
+        details = ", ".join(f"{node.name} {node.elapsed * 1000:.0f}" for node in heaviest)
+        line = f"  {label:<28} 読み込み {total * 1000:6.0f} ms"
+        if self.phases.get(label) is not None:
+            line += f" / 初回描画 {self.phases[label] * 1000:6.0f} ms"
+        return line + (f"  ({details})" if details else "")
+
+    def report(self):
+        self.reported = True
+        print("起動プロファイル:")
+        for elapsed, event in self.marks:
+            print(f"  {elapsed:7.2f}s  {event}")
+        print("モジュールの読み込み時間 (ms):")
+        for label in [MAIN_PHASE] + [label for label in self.phases if label != MAIN_PHASE]:
+            if label in self.imports or label in self.phases:
+                print(self._phase_line(label))
+
+
+def start():
+    """計測を始める（できるだけ早く、ほかのモジュールを読み込む前に呼ぶ）"""
+    global _profile
+    if _profile is None:
+        _profile = StartupProfile()
+        _profile.install()
+
+
+def mark(event):
+    if _profile:
+        _profile.mark(event)
+
+
+def phase(label):
+    if _profile:
+        return _profile.phase(label)
+    return contextlib.nullcontext()
+
+
+def first_frame():
+    """最初のフレームを表示したときに呼ぶ。time-to-first-frameを記録して結果を表示する"""
+    if _profile and not _profile.reported:
+        _profile.mark("最初のフレームを表示 (time-to-first-frame)")
+        _profile.report()
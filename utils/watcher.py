@@ -0,0 +1,137 @@
+import ctypes
+import ctypes.util
+import os
+import struct
+
+# ===================================================================
+# 設定ファイルの変更監視
+# -------------------------------------------------------------------
+# Linuxではinotifyでファイルの書き込みを即座に検知します。
+# inotifyが使えない環境では、更新日時(mtime)を定期的に確認します。
+# エディタは「別名で保存してリネーム」することが多いため、
+# ファイルそのものではなく親ディレクトリを監視します。
+# ===================================================================
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+_EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+
+
+def _load_inotify():
+    """libcのinotify関数を読み込む。使えなければNoneを返す"""
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class FileWatcher:
+    """指定ファイルが変更されたらcallback(path)をイベントループ上で呼ぶ"""
+
+    def __init__(self, loop, paths, callback, poll_interval=5.0, debounce=0.5):
+        self.loop = loop
+        self.paths = [os.path.abspath(p) for p in paths]
+        self.callback = callback
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.mode = None
+        self._fd = None
+        self._watches = {}   # wd -> ディレクトリ
+        self._mtimes = {}
+        self._pending = {}   # path -> TimerHandle（連続イベントをまとめる）
+
+    def start(self):
+        if not self._start_inotify():
+            self._start_polling()
+        print(f"ファイル監視を開始しました ({self.mode})")
+
+    def stop(self):
+        if self._fd is not None:
+            self.loop.remove_reader(self._fd)
+            os.close(self._fd)
+            self._fd = None
+        for handle in self._pending.values():
+            handle.cancel()
+        self._pending.clear()
+        self.mode = None
+
+    # --- inotify ---
+
+    def _start_inotify(self):
+        libc = _load_inotify()
+        if libc is None:
+            return False
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            return False
+        for directory in sorted({os.path.dirname(p) for p in self.paths}):
+            wd = libc.inotify_add_watch(fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                os.close(fd)
+                return False
+            self._watches[wd] = directory
+        self._fd = fd
+        self.loop.add_reader(fd, self._on_inotify)
+        self.mode = 'inotify'
+        return True
+
+    def _on_inotify(self):
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, _mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            directory = self._watches.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, os.fsdecode(name))
+            if path in self.paths:
+                self._schedule(path)
+
+    # --- ポーリング ---
+
+    def _start_polling(self):
+        self._mtimes = {p: self._mtime(p) for p in self.paths}
+        self.mode = 'polling'
+        self.loop.call_later(self.poll_interval, self._poll)
+
+    def _poll(self):
+        if self.mode != 'polling':
+            return
+        for path in self.paths:
+            mtime = self._mtime(path)
+            if mtime != self._mtimes.get(path):
+                self._mtimes[path] = mtime
+                self._schedule(path)
+        self.loop.call_later(self.poll_interval, self._poll)
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    # --- 通知 ---
+
+    def _schedule(self, path):
+        """保存1回で複数のイベントが来るため、少し待ってから1回だけ通知する"""
+        if path in self._pending:
+            self._pending[path].cancel()
+        self._pending[path] = self.loop.call_later(self.debounce, self._fire, path)
+
+    def _fire(self, path):
+        self._pending.pop(path, None)
+        self.callback(path)
@@ -0,0 +1,94 @@
+import functools
+import json
+import os
+import threading
+from utils.api_budget import Coalescer, RequestBudget
+
+# ===================================================================
+# OpenWeatherMap APIの共通の呼び出し口
+# -------------------------------------------------------------------
+# 天気スライドはすべてここを通してAPIを呼び出します。
+#   - 呼び出し回数をエンドポイントごとに数え、上限を超えそうなら呼ばない
+#   - 残りが少なくなったら、キャッシュの有効期間を延ばす (effective_ttl)
+#   - 同じ座標への同時のリクエストは1回にまとめる
+# requests と python-dotenv は、最初に天気を取得するときに読み込みます（起動を速くするため）。
+# ===================================================================
+
+BASE_URL = "https://api.openweathermap.org/data/2.5"
+ENDPOINTS = ("weather", "forecast")  # 1回の更新で呼び出すエンドポイント
+CACHE_DURATION = 1800    # 天気データのキャッシュの有効期間（秒）。1800秒 = 30分
+
+_budget = None
+_budget_lock = threading.Lock()
+_coalescer = Coalescer()
+_transport = None  # requests.get の代わりに使う取得関数（シミュレーション用）
+
+
+def load_config():
+    """設定ファイル(config.json)からAPIの呼び出し上限の設定を読み込む"""
+    try:
+        with open('config.json', 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        return config.get('api_budget', {})
+    except Exception:
+        return {} # エラーの場合は空の設定を返す
+
+
+@functools.lru_cache(maxsize=None)
+def get_api_key():
+    """.envファイルからOpenWeatherMapのAPIキーを読み込む（最初の1回だけ）"""
+    from dotenv import load_dotenv
+    load_dotenv()
+    return os.getenv("OPENWEATHERMAP_API_KEY")
+
+
+def get_budget():
+    """すべての天気スライドで共有する呼び出し回数の管理オブジェクト"""
+    global _budget
+    with _budget_lock:  # 天気スライドは別々のスレッドで描画される
+        if _budget is None:
+            config = load_config()
+            _budget = RequestBudget(config.get('state_file', 'api_budget.json'),
+                                    per_minute=config.get('per_minute', 60),
+                                    per_day=config.get('per_day', 1000))
+        return _budget
+
+
+def set_transport(transport):
+    """
+    APIへのアクセスを transport(url, params=..., timeout=...) に置き換える。
+    transport は requests.get と同じく raise_for_status() と json() を持つ応答を返すこと。
+    Noneを渡すと元に戻る。呼び出し回数の管理はそのまま働く。
+    """
+    global _transport
+    _transport = transport
+
+
+def effective_ttl(ttl):
+    """残りの呼び出し回数に応じて延ばしたキャッシュの有効期間"""
+    return get_budget().stretch(ttl)
+
+
+def fetch_weather(lat, lon, api_key=None, timeout=15):
+    """現在の天気と予報を取得する。上限に達している場合や失敗した場合はNone"""
+    key = (round(lat, 4), round(lon, 4))
+    return _coalescer.run(key, lambda: _fetch(lat, lon, api_key or get_api_key(), timeout))
+
+
+def _fetch(lat, lon, api_key, timeout):
+    import requests
+    budget = get_budget()
+    if not all(budget.allow(endpoint) for endpoint in ENDPOINTS):
+        print("APIの呼び出し上限に近いため、取得を見送ります")
+        return None
+    params = {"lat": lat, "lon": lon, "appid": api_key, "units": "metric", "lang": "en"}
+    data = {}
+    try:
+        for endpoint in ENDPOINTS:
+            response = (_transport or requests.get)(f"{BASE_URL}/{endpoint}", params=params, timeout=timeout)
+            budget.record(endpoint)
+            response.raise_for_status()
+            data[endpoint] = response.json()
+    except requests.exceptions.RequestException as e:
+        print(f"APIリクエストエラー: {e}"); return None
+    return {"current": data["weather"], "forecast": data["forecast"]}
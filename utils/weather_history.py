@@ -0,0 +1,117 @@
+import mmap
+import os
+import struct
+
+# ===================================================================
+# 天気の履歴（リングバッファ）
+# -------------------------------------------------------------------
+# 取得した天気データ（時刻・気温・湿度・降水確率）を、ロケーションごとに
+# 固定サイズのファイルへ順番に書き込みます。いっぱいになったら古いものから
+# 上書きするので、何ヶ月動かしてもファイルの大きさとメモリ使用量は一定です。
+# ファイルはメモリマップして使うため、再起動しても履歴は残ります。
+# ===================================================================
+
+MAGIC = b'WHST'
+_HEADER = struct.Struct('<4sIII')   # マジック, 容量, 次に書く位置, 件数
+_RECORD = struct.Struct('<dfff')    # 時刻, 気温, 湿度, 降水確率
+DEFAULT_CAPACITY = 1024             # 30分ごとなら約3週間分
+MIN_INTERVAL = 10 * 60              # これより短い間隔の記録は無視する（キャッシュの再利用など）
+
+
+class WeatherHistory:
+    """ファイルにメモリマップされた、固定長の天気履歴"""
+
+    def __init__(self, path, capacity=DEFAULT_CAPACITY):
+        self.path = path
+        size = _HEADER.size + capacity * _RECORD.size
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            created = os.fstat(fd).st_size != size
+            if created:
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, size)
+            self._map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+        magic, stored_capacity, self._head, self._count = _HEADER.unpack_from(self._map, 0)
+        if created or magic != MAGIC or stored_capacity != capacity:
+            # 新しいファイル、または形式の違うファイルは空の履歴として初期化する
+            self._head, self._count = 0, 0
+            _HEADER.pack_into(self._map, 0, MAGIC, capacity, 0, 0)
+        self.capacity = capacity
+
+    def __len__(self):
+        return self._count
+
+    def _offset(self, slot):
+        return _HEADER.size + slot * _RECORD.size
+
+    def last_timestamp(self):
+        if self._count == 0:
+            return None
+        slot = (self._head - 1) % self.capacity
+        return _RECORD.unpack_from(self._map, self._offset(slot))[0]
+
+    def append(self, timestamp, temp, humidity, pop):
+        """1件追加する。直前の記録から MIN_INTERVAL 未満なら何もしない"""
+        last = self.last_timestamp()
+        if last is not None and timestamp - last < MIN_INTERVAL:
+            return False
+        _RECORD.pack_into(self._map, self._offset(self._head), timestamp, temp, humidity, pop)
+        self._head = (self._head + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+        _HEADER.pack_into(self._map, 0, MAGIC, self.capacity, self._head, self._count)
+        return True
+
+    def since(self, timestamp):
+        """指定時刻以降の記録を古い順に返す [(時刻, 気温, 湿度, 降水確率), ...]"""
+        records = []
+        # 新しい方からさかのぼり、範囲外に出たら止める
+        for i in range(1, self._count + 1):
+            slot = (self._head - i) % self.capacity
+            record = _RECORD.unpack_from(self._map, self._offset(slot))
+            if record[0] < timestamp:
+                break
+            records.append(record)
+        records.reverse()
+        return records
+
+    def flush(self):
+        self._map.flush()
+
+    def close(self):
+        self._map.close()
+
+
+_histories = {}
+
+
+def get_weather_history(location_key):
+    """ロケーションごとの履歴（プロセス内で使い回す）"""
+    if location_key not in _histories:
+        _histories[location_key] = WeatherHistory(f"weather_history_{location_key}.bin")
+    return _histories[location_key]
+
+
+def draw_sparkline(draw, box, samples, width=2):
+    """box (左, 上, 右, 下) の中に、気温の推移を折れ線で描く。2件未満なら描かない"""
+    if len(samples) < 2:
+        return False
+    left, top, right, bottom = box
+    times = [s[0] for s in samples]
+    temps = [s[1] for s in samples]
+    t_min, t_max = times[0], times[-1]
+    v_min, v_max = min(temps), max(temps)
+    t_span = (t_max - t_min) or 1
+    v_span = (v_max - v_min) or 1
+    points = [
+        (left + (t - t_min) / t_span * (right - left),
+         bottom - (v - v_min) / v_span * (bottom - top))
+        for t, v in zip(times, temps)
+    ]
+    draw.line(points, fill=0, width=width, joint='curve')
+    # 現在の値を示す点
+    x, y = points[-1]
+    draw.ellipse((x - 3, y - 3, x + 3, y + 3), fill=0)
+    return True